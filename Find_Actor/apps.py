@@ -4,3 +4,8 @@ from django.apps import AppConfig
 class FindActorConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'Find_Actor'
+
+    def ready(self):
+        from path_cache import default_cache, Django_backend
+
+        default_cache.backend = Django_backend()
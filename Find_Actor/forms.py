@@ -29,8 +29,8 @@ class Actors_submit(forms.Form):
         return cleaned_data
 
 class Actors_choice(forms.Form):
-    start_actor = forms.ChoiceField(choices=[], widget=forms.Select(attrs={'class':'form-select'}), required=True)
-    goal_actor = forms.ChoiceField(choices=[], widget=forms.Select(attrs={'class':'form-select'}), required=True)
+    start_actor = forms.TypedChoiceField(choices=[], coerce=int, widget=forms.Select(attrs={'class':'form-select'}), required=True)
+    goal_actor = forms.TypedChoiceField(choices=[], coerce=int, widget=forms.Select(attrs={'class':'form-select'}), required=True)
     
     def __init__(self, *args, **kwargs):
         start_list = kwargs.pop('start_list', [])
@@ -0,0 +1,24 @@
+# Generated by Django 4.2.30 on 2026-10-18 12:22
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('Find_Actor', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Degrees',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('distance', models.IntegerField()),
+            ],
+            options={
+                'db_table': 'degrees',
+                'managed': False,
+            },
+        ),
+    ]
@@ -1,15 +1,23 @@
 from django.db import models
+from database.ids import actor_nconst, movie_tconst
 
 
 class Actors(models.Model):
-    id = models.CharField(primary_key=True, max_length=20)
+    id = models.IntegerField(primary_key=True)
     name = models.CharField(max_length=100)
     birth_year = models.FloatField(blank=True, null=True)
     death_year = models.FloatField(blank=True, null=True)
+    movie_count = models.IntegerField(blank=True, null=True)
+    co_star_count = models.IntegerField(blank=True, null=True)
+    component = models.IntegerField(blank=True, null=True)
 
     class Meta:
         managed = False
         db_table = 'actors'
+
+    @property
+    def imdb_id(self):
+        return actor_nconst(self.id)
         
     def __str__(self):
         if not self.birth_year:
@@ -40,7 +48,7 @@ class Cast(models.Model):
 
 
 class Movies(models.Model):
-    id = models.CharField(primary_key=True, max_length=20)
+    id = models.IntegerField(primary_key=True)
     original_title = models.CharField(max_length=200)
     start_year = models.IntegerField(blank=True, null=True)
 
@@ -48,6 +56,10 @@ class Movies(models.Model):
         managed = False
         db_table = 'movies'
 
+    @property
+    def imdb_id(self):
+        return movie_tconst(self.id)
+
 
 class Ratings(models.Model):
     movie = models.ForeignKey(Movies, on_delete=models.CASCADE,related_name='rating')
@@ -57,3 +69,15 @@ class Ratings(models.Model):
     class Meta:
         managed = False
         db_table = 'ratings'
+
+
+class Degrees(models.Model):
+    center = models.ForeignKey(Actors, on_delete=models.CASCADE, related_name='+')
+    actor = models.ForeignKey(Actors, on_delete=models.CASCADE, related_name='degrees')
+    distance = models.IntegerField()
+    parent = models.ForeignKey(Actors, on_delete=models.CASCADE, related_name='+', blank=True, null=True)
+    movie = models.ForeignKey(Movies, on_delete=models.CASCADE, related_name='+', blank=True, null=True)
+
+    class Meta:
+        managed = False
+        db_table = 'degrees'
@@ -2,12 +2,41 @@ from django.shortcuts import render, HttpResponse, redirect
 from django.http import JsonResponse
 from django.conf import settings
 from .forms import Actors_submit, Actors_choice
-from find_actors import Find_Actor_BFS
+from find_actors import Find_Actor_BFS, Not_connected, Budget_exceeded, Cancel_token
+from concurrent import futures
 from time import time_ns
 from .models import Movies, Ratings, Actors, Akas, Cast
 from .utils import format_results
 
 
+# Searches run in threads, so request can stop waiting and cancel them
+search_pool = futures.ThreadPoolExecutor()
+
+
+def search(request, start_id, goal_id):
+    cancel_token = Cancel_token()
+    future = search_pool.submit(
+        Find_Actor_BFS.run,
+        start_id,
+        goal_id,
+        print_solution=True,
+        cancel_token=cancel_token,
+        **settings.SEARCH_BUDGET,
+    )
+    try:
+        res = future.result(timeout=settings.SEARCH_REQUEST_TIMEOUT)
+    except Not_connected:
+        request.session['results'] = None
+        request.session['error'] = 'These actors are not connected by any movies'
+    except (Budget_exceeded, futures.TimeoutError):
+        cancel_token.cancel()
+        request.session['results'] = None
+        request.session['error'] = 'Search took too long, these actors are too far apart'
+    else:
+        request.session['results'] = res
+        request.session['error'] = None
+    return redirect('results')
+
 def index(request):
     context = {}
     if request.method == 'POST':
@@ -17,9 +46,7 @@ def index(request):
             goal_list = form.cleaned_data['goal_list']
             if start_list.count() == 1 and goal_list.count() == 1:
                 start_id, goal_id = start_list.first().id, goal_list.first().id
-                res = Find_Actor_BFS.run(start_id, goal_id, print_solution=True)
-                request.session['results'] = res
-                return redirect('results')
+                return search(request, start_id, goal_id)
             
             start_list = [(actor.id, str(actor)) for actor in start_list]
             goal_list = [(actor.id, str(actor)) for actor in goal_list]
@@ -43,9 +70,7 @@ def choices(request):
         if form.is_valid():
             start_id = form.cleaned_data['start_actor']
             goal_id = form.cleaned_data['goal_actor']
-            res = Find_Actor_BFS.run(start_id, goal_id, print_solution=True)
-            request.session['results'] = res
-            return redirect('results')
+            return search(request, start_id, goal_id)
         else:
             # Form is invalid, print validation errors for each field
             for field, errors in form.errors.items():
@@ -58,6 +83,8 @@ def choices(request):
         return render(request, 'choices.html', context={'form':form})
 
 def results(request):
+    if error:=request.session.get('error', None):
+        return render(request, 'results.html', {'error':error})
     if not (results:=request.session.get('results', None)):
         return redirect('index')
     
@@ -75,6 +75,26 @@ DATABASES = {
     }
 }
 
+# Cache of found paths between actors
+# https://docs.djangoproject.com/en/4.2/topics/cache/
+
+CACHES = {
+    "default": {
+        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+        "OPTIONS": {"MAX_ENTRIES": 10000},
+    }
+}
+
+# Limits of single search started by a request, see Find_Actor_BFS
+SEARCH_BUDGET = {
+    "max_layer": 6,
+    "max_nodes": 200000,
+    "timeout": 10,
+}
+
+# Seconds request waits for search before cancelling it, covers steps between budget checks
+SEARCH_REQUEST_TIMEOUT = 15
+
 
 # Password validation
 # https://docs.djangoproject.com/en/4.2/ref/settings/#auth-password-validators
@@ -0,0 +1,311 @@
+import os
+import functools
+import numpy as np
+import pandas as pd
+from typing import Iterable
+from sqlalchemy import select
+from .graph import (
+    Cast_graph,
+    Snapshot_error,
+    build_csr,
+    data_dir,
+    gather,
+    get_graph,
+    open_arrays,
+    transformed_dir,
+    write_arrays,
+)
+from .models import Akas, Movies, Ratings
+from .shards import read_table, table_exists
+
+movie_attributes_path = os.path.join(data_dir, "movies.bin")
+MAX_WEIGHT = 1000
+
+
+def movie_weights(votes: np.ndarray):
+    """Cost of connecting actors through movie, the more votes the cheaper
+
+    Weight falls with logarithm of votes from MAX_WEIGHT for movies without
+    votes to 1 for the most voted movie.
+
+    Args:
+        votes (np.ndarray): number of votes of every movie
+
+    Returns:
+        np.ndarray: integer weights in range 1..MAX_WEIGHT
+    """
+    popularity = np.log1p(votes.astype(np.float64))
+    if len(votes) and popularity.max() > 0:
+        popularity /= popularity.max()
+    return (1 + np.rint((MAX_WEIGHT - 1) * (1 - popularity))).astype(np.int32)
+
+
+class Movie_attributes:
+    def __init__(
+        self,
+        year: np.ndarray,
+        rating: np.ndarray,
+        votes: np.ndarray,
+        region_offsets: np.ndarray,
+        regions: np.ndarray,
+        region_names: list,
+        dataset: str | None = None,
+        weight: np.ndarray | None = None,
+    ) -> None:
+        """Init of Movie_attributes class
+
+        Columns of movies, ratings and akas tables aligned with movie indices
+        of graph, so constraints compile to masks with vectorized comparisons.
+
+        Args:
+            year (np.ndarray): start year of every movie, -1 if unknown
+            rating (np.ndarray): average rating, nan if movie has no rating
+            votes (np.ndarray): number of votes, 0 if movie has no rating
+            region_offsets (np.ndarray): CSR offsets of movie -> regions
+            regions (np.ndarray): codes of regions of akas of every movie
+            region_names (list): region of every code
+            dataset (str | None): version of data of graph
+            weight (np.ndarray | None): weight of every movie for weighted search,
+                computed from votes when None
+        """
+        self.year = year
+        self.rating = rating
+        self.votes = votes
+        self.region_offsets = region_offsets
+        self.regions = regions
+        self.region_names = region_names
+        self.dataset = dataset
+        self.weight = weight if weight is not None else movie_weights(votes)
+
+    @classmethod
+    def from_frames(
+        cls,
+        graph: Cast_graph,
+        movies: pd.DataFrame,
+        ratings: pd.DataFrame,
+        akas: pd.DataFrame,
+    ):
+        """Aligns movies (id, start_year), ratings (movie_id, average, num_votes)
+        and akas (movie_id, region) frames with movies of graph"""
+        year = np.full(graph.num_movies, -1, dtype=np.int16)
+        indices = graph.movie_indices(movies["id"])
+        found = indices >= 0
+        year[indices[found]] = movies["start_year"].to_numpy()[found]
+
+        rating = np.full(graph.num_movies, np.nan, dtype=np.float32)
+        votes = np.zeros(graph.num_movies, dtype=np.int32)
+        indices = graph.movie_indices(ratings["movie_id"])
+        found = indices >= 0
+        rating[indices[found]] = ratings["average"].to_numpy()[found]
+        votes[indices[found]] = ratings["num_votes"].to_numpy()[found]
+
+        akas = akas[["movie_id", "region"]].drop_duplicates()
+        indices = graph.movie_indices(akas["movie_id"])
+        found = indices >= 0
+        codes, region_names = pd.factorize(akas["region"][found], sort=True)
+        region_offsets, regions = build_csr(indices[found], codes, graph.num_movies)
+        return cls(
+            year,
+            rating,
+            votes,
+            region_offsets,
+            regions.astype(np.int16),
+            list(region_names),
+            graph.dataset,
+        )
+
+    @classmethod
+    def from_csv(cls, graph: Cast_graph, directory: str = transformed_dir):
+        """Builds attributes from transformed movies, ratings and akas files or their shards"""
+        movies = read_table(directory, "movies", usecols=["id", "start_year"])
+        ratings = read_table(directory, "ratings")
+        akas = read_table(directory, "akas", usecols=["movie_id", "region"], keep_default_na=False)
+        return cls.from_frames(graph, movies, ratings, akas)
+
+    @classmethod
+    def from_session(cls, graph: Cast_graph, session):
+        """Builds attributes from movies, ratings and akas tables of database"""
+        movies = pd.DataFrame(
+            session.execute(select(Movies.id, Movies.start_year)).all(),
+            columns=["id", "start_year"],
+        )
+        ratings = pd.DataFrame(
+            session.execute(select(Ratings.movie_id, Ratings.average, Ratings.num_votes)).all(),
+            columns=["movie_id", "average", "num_votes"],
+        )
+        akas = pd.DataFrame(
+            session.execute(select(Akas.movie_id, Akas.region)).all(),
+            columns=["movie_id", "region"],
+        )
+        movies["start_year"] = movies["start_year"].fillna(-1)
+        return cls.from_frames(graph, movies, ratings, akas)
+
+    def save(self, file_path: str = movie_attributes_path):
+        arrays = {
+            "year": self.year,
+            "rating": self.rating,
+            "votes": self.votes,
+            "region_offsets": self.region_offsets,
+            "regions": self.regions,
+            "weight": self.weight,
+        }
+        write_arrays(file_path, arrays, {"dataset": self.dataset, "region_names": self.region_names})
+
+    @classmethod
+    def open(cls, file_path: str = movie_attributes_path):
+        arrays, meta = open_arrays(file_path)
+        try:
+            return cls(
+                arrays["year"],
+                arrays["rating"],
+                arrays["votes"],
+                arrays["region_offsets"],
+                arrays["regions"],
+                meta["region_names"],
+                meta["dataset"],
+                arrays["weight"],
+            )
+        except KeyError as e:
+            raise Snapshot_error(f"{file_path} is missing {e}")
+
+    def region_mask(self, regions: Iterable):
+        """Movies with title in any of regions"""
+        codes = [self.region_names.index(region) for region in regions if region in self.region_names]
+        num_movies = len(self.year)
+        regions, owners = gather(self.region_offsets, self.regions, np.arange(num_movies))
+        mask = np.zeros(num_movies, dtype=bool)
+        mask[owners[np.isin(regions, codes)]] = True
+        return mask
+
+
+class Constraints:
+    def __init__(
+        self,
+        min_year: int | None = None,
+        max_year: int | None = None,
+        min_rating: float | None = None,
+        min_votes: int | None = None,
+        regions: Iterable | None = None,
+        exclude_actors: Iterable = (),
+        exclude_movies: Iterable = (),
+    ) -> None:
+        """Init of Constraints class
+
+        Restrictions of movies and actors which path may go through.
+
+        Args:
+            min_year (int | None): earliest start year of movie
+            max_year (int | None): latest start year of movie
+            min_rating (float | None): minimal average rating, movies without rating are excluded
+            min_votes (int | None): minimal number of votes, movies without rating are excluded
+            regions (Iterable | None): movie must have title in one of regions
+            exclude_actors (Iterable): ids of actors which can't be on path
+            exclude_movies (Iterable): ids of movies which can't be on path
+        """
+        self.min_year = min_year
+        self.max_year = max_year
+        self.min_rating = min_rating
+        self.min_votes = min_votes
+        self.regions = tuple(sorted(set(regions))) if regions is not None else None
+        self.exclude_actors = tuple(sorted(set(exclude_actors)))
+        self.exclude_movies = tuple(sorted(set(exclude_movies)))
+
+    @property
+    def key(self):
+        return (
+            self.min_year,
+            self.max_year,
+            self.min_rating,
+            self.min_votes,
+            self.regions,
+            self.exclude_actors,
+            self.exclude_movies,
+        )
+
+    def __eq__(self, other):
+        return isinstance(other, Constraints) and self.key == other.key
+
+    def __hash__(self):
+        return hash(self.key)
+
+    def __str__(self):
+        names = ("min_year", "max_year", "min_rating", "min_votes", "regions", "exclude_actors", "exclude_movies")
+        return ";".join(
+            f"{name}={','.join(map(str, value)) if isinstance(value, tuple) else value}"
+            for name, value in zip(names, self.key)
+            if value not in (None, ())
+        )
+
+    def __bool__(self):
+        return bool(str(self))
+
+    def movie_mask(self, attributes: Movie_attributes, graph: Cast_graph):
+        """Allowed movies of graph"""
+        mask = np.ones(graph.num_movies, dtype=bool)
+        if self.min_year is not None:
+            mask &= attributes.year >= self.min_year
+        if self.max_year is not None:
+            mask &= (attributes.year >= 0) & (attributes.year <= self.max_year)
+        if self.min_rating is not None:
+            mask &= attributes.rating >= self.min_rating
+        if self.min_votes is not None:
+            mask &= attributes.votes >= self.min_votes
+        if self.regions is not None:
+            mask &= attributes.region_mask(self.regions)
+        if self.exclude_movies:
+            indices = graph.movie_indices(self.exclude_movies)
+            mask[indices[indices >= 0]] = False
+        return mask
+
+    def actor_mask(self, graph: Cast_graph):
+        """Allowed actors of graph"""
+        mask = np.ones(graph.num_actors, dtype=bool)
+        if self.exclude_actors:
+            indices = graph.actor_indices(self.exclude_actors)
+            mask[indices[indices >= 0]] = False
+        return mask
+
+
+@functools.lru_cache(maxsize=None)
+def get_movie_attributes():
+    """Loads movie attributes once per process
+
+    Attributes file is used unless it was built for other graph, otherwise
+    they are built from transformed files if present or from database.
+
+    Returns:
+        Movie_attributes: attributes aligned with movies of get_graph()
+    """
+    graph = get_graph()
+    if graph.dataset is not None and os.path.exists(movie_attributes_path):
+        try:
+            attributes = Movie_attributes.open(movie_attributes_path)
+        except Snapshot_error as e:
+            print(f"Ignoring movie attributes: {e}")
+        else:
+            if attributes.dataset == graph.dataset and len(attributes.year) == graph.num_movies:
+                return attributes
+            print("Ignoring movie attributes: graph changed")
+
+    if table_exists(transformed_dir, "movies"):
+        return Movie_attributes.from_csv(graph)
+
+    from .database import get_session
+
+    with get_session() as session:
+        return Movie_attributes.from_session(graph, session)
+
+
+@functools.lru_cache(maxsize=64)
+def get_masks(constraints: Constraints):
+    """Compiles constraints to masks of allowed movies and actors, recently used are cached
+
+    Returns:
+        tuple: (movie mask, actor mask) over indices of get_graph()
+    """
+    graph = get_graph()
+    movie_mask = constraints.movie_mask(get_movie_attributes(), graph)
+    actor_mask = constraints.actor_mask(graph)
+    movie_mask.flags.writeable = False
+    actor_mask.flags.writeable = False
+    return movie_mask, actor_mask
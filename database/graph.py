@@ -0,0 +1,913 @@
+import os
+import json
+import zlib
+import functools
+import numpy as np
+import pandas as pd
+from typing import Iterable
+from sqlalchemy import select
+from .models import Cast
+from .shards import read_table, table_exists, table_version
+
+data_dir = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data")
+transformed_dir = os.path.join(data_dir, "transformed")
+snapshot_path = os.path.join(data_dir, "graph.bin")
+landmarks_path = os.path.join(data_dir, "landmarks.bin")
+
+SNAPSHOT_MAGIC = b"SCGRAPH\0"
+SNAPSHOT_VERSION = 2
+ALIGNMENT = 64
+
+
+class Snapshot_error(Exception):
+    pass
+
+
+def dataset_version(file_path: str):
+    """Returns fingerprint of file used to detect stale snapshots"""
+    stat = os.stat(file_path)
+    return f"{stat.st_size}-{stat.st_mtime_ns}"
+
+
+def write_arrays(file_path: str, arrays: dict, meta: dict):
+    """Writes arrays into versioned binary file which can be memory-mapped
+
+    Layout: magic | header length (uint64) | JSON header | header crc32 (uint32) | arrays,
+    every array aligned to 64 bytes. File is written aside and moved in place,
+    so processes reading old file are not affected.
+
+    Args:
+        file_path (str): destination path
+        arrays (dict): name -> np.ndarray
+        meta (dict): JSON serializable metadata stored in header
+    """
+    arrays = {name: np.ascontiguousarray(array) for name, array in arrays.items()}
+    checksum = 0
+    for array in arrays.values():
+        checksum = zlib.crc32(array.view(np.uint8).reshape(-1), checksum)
+
+    header = {"version": SNAPSHOT_VERSION, "meta": meta, "checksum": checksum, "arrays": {}}
+    # Offsets depend on header length, so header is serialized until it stops growing
+    header_size = 0
+    while True:
+        offset = -(-(len(SNAPSHOT_MAGIC) + 12 + header_size) // ALIGNMENT) * ALIGNMENT
+        for name, array in arrays.items():
+            header["arrays"][name] = {
+                "dtype": array.dtype.str,
+                "shape": list(array.shape),
+                "offset": offset,
+            }
+            offset += -(-array.nbytes // ALIGNMENT) * ALIGNMENT
+        encoded = json.dumps(header).encode()
+        if len(encoded) <= header_size:
+            break
+        header_size = len(encoded) + 64
+    encoded = encoded.ljust(header_size)
+
+    tmp_path = f"{file_path}.tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(SNAPSHOT_MAGIC)
+        f.write(np.uint64(header_size).tobytes())
+        f.write(encoded)
+        f.write(np.uint32(zlib.crc32(encoded)).tobytes())
+        for name, array in arrays.items():
+            f.seek(header["arrays"][name]["offset"])
+            f.write(array.tobytes())
+        f.truncate(offset)
+    os.replace(tmp_path, file_path)
+
+
+def open_arrays(file_path: str, verify: bool = False):
+    """Memory-maps arrays written by write_arrays
+
+    Args:
+        file_path (str): path of file
+        verify (bool): recompute checksum of all arrays. Defaults to False.
+
+    Raises:
+        Snapshot_error: When file is corrupted or written by other version
+
+    Returns:
+        tuple: (arrays, meta)
+    """
+    file_size = os.path.getsize(file_path)
+    with open(file_path, "rb") as f:
+        if f.read(len(SNAPSHOT_MAGIC)) != SNAPSHOT_MAGIC:
+            raise Snapshot_error(f"{file_path} is not a graph snapshot")
+        header_size = int(np.frombuffer(f.read(8), dtype=np.uint64)[0])
+        if header_size > file_size:
+            raise Snapshot_error(f"{file_path} has corrupted header")
+        encoded = f.read(header_size)
+        crc = f.read(4)
+    if len(crc) != 4 or zlib.crc32(encoded) != int(np.frombuffer(crc, dtype=np.uint32)[0]):
+        raise Snapshot_error(f"{file_path} has corrupted header")
+    header = json.loads(encoded)
+    if header["version"] != SNAPSHOT_VERSION:
+        raise Snapshot_error(
+            f"{file_path} has version {header['version']}, expected {SNAPSHOT_VERSION}"
+        )
+
+    arrays = {}
+    checksum = 0
+    for name, info in header["arrays"].items():
+        dtype = np.dtype(info["dtype"])
+        shape = tuple(info["shape"])
+        if info["offset"] + dtype.itemsize * int(np.prod(shape)) > file_size:
+            raise Snapshot_error(f"{file_path} is truncated")
+        if 0 in shape:
+            arrays[name] = np.empty(shape, dtype=dtype)
+        else:
+            arrays[name] = np.memmap(file_path, dtype=dtype, mode="r", offset=info["offset"], shape=shape)
+        if verify:
+            checksum = zlib.crc32(np.asarray(arrays[name]).view(np.uint8).reshape(-1), checksum)
+    if verify and checksum != header["checksum"]:
+        raise Snapshot_error(f"{file_path} has wrong checksum")
+    return arrays, header["meta"]
+
+
+def build_csr(keys: np.ndarray, values: np.ndarray, size: int):
+    """Builds compressed sparse row arrays from pairs of (key, value)
+
+    Args:
+        keys (np.ndarray): row of every pair
+        values (np.ndarray): column of every pair
+        size (int): number of rows
+
+    Returns:
+        tuple: (offsets, values) where values of row i are values[offsets[i]:offsets[i+1]]
+    """
+    order = np.argsort(keys, kind="stable")
+    offsets = np.zeros(size + 1, dtype=np.int64)
+    np.cumsum(np.bincount(keys, minlength=size), out=offsets[1:])
+    return offsets, values[order].astype(np.int32)
+
+
+def gather(offsets: np.ndarray, values: np.ndarray, rows: np.ndarray):
+    """Concatenates CSR rows without python loop
+
+    Args:
+        offsets (np.ndarray): CSR offsets
+        values (np.ndarray): CSR values
+        rows (np.ndarray): rows to gather
+
+    Returns:
+        tuple: (values of all rows, position in rows of every value)
+    """
+    starts = offsets[rows]
+    lengths = offsets[rows + 1] - starts
+    owners = np.repeat(np.arange(len(rows)), lengths)
+    shifts = np.repeat(starts - (np.cumsum(lengths) - lengths), lengths)
+    return values[np.arange(len(owners)) + shifts], owners
+
+
+class Cast_graph:
+    def __init__(
+        self,
+        actor_ids: np.ndarray,
+        movie_ids: np.ndarray,
+        actor_offsets: np.ndarray,
+        actor_movies: np.ndarray,
+        movie_offsets: np.ndarray,
+        movie_actors: np.ndarray,
+        dataset: str | None = None,
+        components: tuple | None = None,
+    ) -> None:
+        """Init of Cast_graph class
+
+        Actors and movies are numbered 0..n-1 in sorted order of their ids,
+        so lookups by id are binary searches over actor_ids/movie_ids.
+
+        Args:
+            actor_ids (np.ndarray): sorted integer actor key of every actor index
+            movie_ids (np.ndarray): sorted integer movie key of every movie index
+            actor_offsets (np.ndarray): CSR offsets of actor -> movies
+            actor_movies (np.ndarray): movie indices of every actor
+            movie_offsets (np.ndarray): CSR offsets of movie -> actors
+            movie_actors (np.ndarray): actor indices of every movie
+            dataset (str | None): version of data graph was built from
+            components (tuple | None): precomputed (component of every actor, size of every component)
+        """
+        self.actor_ids = actor_ids
+        self.movie_ids = movie_ids
+        self.actor_offsets = actor_offsets
+        self.actor_movies = actor_movies
+        self.movie_offsets = movie_offsets
+        self.movie_actors = movie_actors
+        self.dataset = dataset
+        self._components = components
+
+    @property
+    def num_actors(self):
+        return len(self.actor_ids)
+
+    @property
+    def num_movies(self):
+        return len(self.movie_ids)
+
+    @classmethod
+    def from_frame(cls, cast: pd.DataFrame, dataset: str | None = None):
+        """Builds graph from frame with movie_id and actor_id columns
+
+        Args:
+            cast (pd.DataFrame): cast table
+            dataset (str | None): version of data
+
+        Returns:
+            Cast_graph: graph instance
+        """
+        cast = cast[["movie_id", "actor_id"]].drop_duplicates()
+        movie_codes, movie_ids = pd.factorize(cast["movie_id"], sort=True)
+        actor_codes, actor_ids = pd.factorize(cast["actor_id"], sort=True)
+        actor_offsets, actor_movies = build_csr(actor_codes, movie_codes, len(actor_ids))
+        movie_offsets, movie_actors = build_csr(movie_codes, actor_codes, len(movie_ids))
+        return cls(
+            np.asarray(actor_ids, dtype=np.int64),
+            np.asarray(movie_ids, dtype=np.int64),
+            actor_offsets,
+            actor_movies,
+            movie_offsets,
+            movie_actors,
+            dataset,
+        )
+
+    @classmethod
+    def from_csv(cls, directory: str = transformed_dir):
+        """Builds graph from transformed cast file or its shards"""
+        cast = read_table(directory, "cast", usecols=["movie_id", "actor_id"], dtype=np.int64)
+        return cls.from_frame(cast, table_version(directory, "cast"))
+
+    @classmethod
+    def from_session(cls, session):
+        """Builds graph from cast table of database"""
+        query = select(Cast.movie_id, Cast.actor_id)
+        cast = pd.DataFrame(session.execute(query).all(), columns=["movie_id", "actor_id"])
+        return cls.from_frame(cast)
+
+    def save(self, file_path: str = snapshot_path):
+        """Saves graph as binary snapshot"""
+        arrays = {
+            "actor_ids": self.actor_ids,
+            "movie_ids": self.movie_ids,
+            "actor_offsets": self.actor_offsets,
+            "actor_movies": self.actor_movies,
+            "movie_offsets": self.movie_offsets,
+            "movie_actors": self.movie_actors,
+            "component": self.component,
+            "component_sizes": self.component_sizes,
+        }
+        write_arrays(file_path, arrays, {"dataset": self.dataset})
+
+    @classmethod
+    def open(cls, file_path: str = snapshot_path, verify: bool = False):
+        """Opens binary snapshot with arrays memory-mapped
+
+        Pages of snapshot are shared by all processes which opened it.
+
+        Args:
+            file_path (str): path of snapshot
+            verify (bool): recompute checksum of snapshot. Defaults to False.
+
+        Raises:
+            Snapshot_error: When snapshot is corrupted or written by other version
+
+        Returns:
+            Cast_graph: graph instance
+        """
+        arrays, meta = open_arrays(file_path, verify)
+        components = None
+        if "component" in arrays:
+            components = (arrays["component"], arrays["component_sizes"])
+        try:
+            return cls(
+                arrays["actor_ids"],
+                arrays["movie_ids"],
+                arrays["actor_offsets"],
+                arrays["actor_movies"],
+                arrays["movie_offsets"],
+                arrays["movie_actors"],
+                meta["dataset"],
+                components,
+            )
+        except KeyError as e:
+            raise Snapshot_error(f"{file_path} is missing {e}")
+
+    def actor_index(self, actor_id: int):
+        """Returns index of actor or None if actor has no movies in graph"""
+        index = int(np.searchsorted(self.actor_ids, actor_id))
+        if index < self.num_actors and self.actor_ids[index] == actor_id:
+            return index
+        return None
+
+    def actor_indices(self, actor_ids: Iterable):
+        """Vectorized actor_index, returns -1 for actors missing in graph"""
+        keys = np.asarray(actor_ids, dtype=np.int64)
+        indices = np.searchsorted(self.actor_ids, keys)
+        found = indices < self.num_actors
+        found[found] = self.actor_ids[indices[found]] == keys[found]
+        return np.where(found, indices, -1)
+
+    def actor_id(self, index: int):
+        return int(self.actor_ids[index])
+
+    def movie_id(self, index: int):
+        return int(self.movie_ids[index])
+
+    def movie_indices(self, movie_ids: Iterable):
+        """Vectorized movie lookup, returns -1 for movies missing in graph"""
+        keys = np.asarray(movie_ids, dtype=np.int64)
+        indices = np.searchsorted(self.movie_ids, keys)
+        found = indices < self.num_movies
+        found[found] = self.movie_ids[indices[found]] == keys[found]
+        return np.where(found, indices, -1)
+
+    def movies_of(self, actor: int):
+        return self.actor_movies[self.actor_offsets[actor] : self.actor_offsets[actor + 1]]
+
+    def actors_of(self, movie: int):
+        return self.movie_actors[self.movie_offsets[movie] : self.movie_offsets[movie + 1]]
+
+    def movie_count(self, actor: int):
+        return int(self.actor_offsets[actor + 1] - self.actor_offsets[actor])
+
+    @property
+    def component(self):
+        """Connected component of every actor, components are numbered from the largest"""
+        if self._components is None:
+            self._components = self.connected_components()
+        return self._components[0]
+
+    @property
+    def component_sizes(self):
+        if self._components is None:
+            self._components = self.connected_components()
+        return self._components[1]
+
+    def connected_components(self):
+        """Labels connected components by propagating smallest actor index through movies
+
+        Returns:
+            tuple: (component of every actor, size of every component), largest component first
+        """
+        labels = np.arange(self.num_actors, dtype=np.int32)
+        if not self.num_actors:
+            return labels, np.zeros(0, dtype=np.int64)
+        while True:
+            movie_labels = np.minimum.reduceat(labels[self.movie_actors], self.movie_offsets[:-1])
+            new_labels = np.minimum.reduceat(movie_labels[self.actor_movies], self.actor_offsets[:-1])
+            # Label is an actor of the same component, so following labels shortens chains
+            new_labels = new_labels[new_labels]
+            if np.array_equal(new_labels, labels):
+                break
+            labels = new_labels
+
+        _, component, sizes = np.unique(labels, return_inverse=True, return_counts=True)
+        order = np.argsort(-sizes, kind="stable")
+        rank = np.empty_like(order)
+        rank[order] = np.arange(len(order))
+        return rank[component].astype(np.int32), sizes[order]
+
+    def connected(self, actor: int, other: int):
+        return bool(self.component[actor] == self.component[other])
+
+    @functools.cached_property
+    def movie_counts(self):
+        return np.diff(self.actor_offsets)
+
+    def neighbors(
+        self,
+        actor: int,
+        expanded: set | None = None,
+        movie_mask: np.ndarray | None = None,
+        actor_mask: np.ndarray | None = None,
+    ):
+        """Getting all actors who worked with current actor
+
+        Args:
+            actor (int): actor index
+            expanded (set | None): movies whose cast was already enumerated,
+                they are skipped and new movies are added
+            movie_mask (np.ndarray | None): allowed movies, others are skipped
+            actor_mask (np.ndarray | None): allowed actors, others are skipped
+
+        Returns:
+            Iterable: pairs of common movie index and neighbor actor index
+        """
+        movies = self.movies_of(actor)
+        if movie_mask is not None:
+            movies = movies[movie_mask[movies]]
+        for movie in movies:
+            movie = int(movie)
+            if expanded is not None:
+                if movie in expanded:
+                    continue
+                expanded.add(movie)
+            cast = self.actors_of(movie)
+            if actor_mask is not None:
+                cast = cast[actor_mask[cast]]
+            for neighbor in cast:
+                if neighbor != actor:
+                    yield movie, int(neighbor)
+
+
+class Graph_BFS:
+    DIRECTIONS = ("auto", "top_down", "bottom_up")
+    # Switching thresholds of direction-optimizing BFS (Beamer et al.)
+    alpha = 14
+    beta = 24
+
+    def __init__(
+        self,
+        graph: Cast_graph,
+        source: int,
+        direction: str = "auto",
+        movie_mask: np.ndarray | None = None,
+        actor_mask: np.ndarray | None = None,
+    ) -> None:
+        """Init of Graph_BFS class
+
+        Layer-synchronous search over actor and movie indices. Visited actors,
+        expanded movies and frontier are boolean arrays and every layer is
+        expanded with vectorized gathers over CSR arrays.
+
+        Args:
+            graph (Cast_graph): graph to search
+            source (int): index of start actor
+            direction (str): "top_down" expands frontier, "bottom_up" checks unvisited
+                actors for parent in frontier, "auto" switches between them by
+                size of frontier. Defaults to "auto".
+            movie_mask (np.ndarray | None): allowed movies, others are never expanded
+            actor_mask (np.ndarray | None): allowed actors, others are never discovered;
+                they are marked visited from start, but keep distance -1
+        """
+        if direction not in self.DIRECTIONS:
+            raise ValueError(f"Unknown direction {direction}, expected one of {self.DIRECTIONS}")
+        self.graph = graph
+        self.source = source
+        self.direction = direction
+        self.bottom_up = direction == "bottom_up"
+        self.layer = 0
+        self.stats = []
+        if actor_mask is not None:
+            self.visited = ~actor_mask
+        else:
+            self.visited = np.zeros(graph.num_actors, dtype=bool)
+        if movie_mask is not None:
+            self.movie_visited = ~movie_mask
+        else:
+            self.movie_visited = np.zeros(graph.num_movies, dtype=bool)
+        self.frontier = np.zeros(graph.num_actors, dtype=bool)
+        self.distance = np.full(graph.num_actors, -1, dtype=np.int16)
+        self.parent_actor = np.full(graph.num_actors, -1, dtype=np.int32)
+        self.parent_movie = np.full(graph.num_actors, -1, dtype=np.int32)
+        self.movie_parent = np.full(graph.num_movies, -1, dtype=np.int32)
+        self.unexplored_edges = len(graph.actor_movies) - graph.movie_count(source)
+        self.visited[source] = True
+        self.frontier[source] = True
+        self.distance[source] = 0
+
+    def step(self):
+        """Expands whole frontier by one layer
+
+        In "auto" direction search goes bottom-up when edges of frontier exceed
+        1/alpha of edges of unvisited actors and back top-down when frontier
+        shrinks below 1/beta of all actors.
+
+        Returns:
+            np.ndarray: indices of actors discovered in new layer
+        """
+        graph = self.graph
+        frontier_size = int(np.count_nonzero(self.frontier))
+        frontier_edges = int(graph.movie_counts[self.frontier].sum())
+        if self.direction == "auto":
+            if self.bottom_up:
+                self.bottom_up = frontier_size >= graph.num_actors / self.beta
+            else:
+                self.bottom_up = frontier_edges > self.unexplored_edges / self.alpha
+
+        cast = self.step_bottom_up() if self.bottom_up else self.step_top_down()
+        self.parent_actor[cast] = self.movie_parent[self.parent_movie[cast]]
+
+        self.layer += 1
+        self.visited[cast] = True
+        self.distance[cast] = self.layer
+        self.frontier[:] = False
+        self.frontier[cast] = True
+        self.unexplored_edges -= int(graph.movie_counts[cast].sum())
+        self.stats.append(
+            {
+                "layer": self.layer,
+                "direction": "bottom_up" if self.bottom_up else "top_down",
+                "frontier": frontier_size,
+                "frontier_edges": frontier_edges,
+                "discovered": len(cast),
+            }
+        )
+        return cast
+
+    def step_top_down(self):
+        """Gathers movies of frontier and their unvisited cast
+
+        Actors of frontier are ordered by movie count, so actors from more movies
+        become parents first like in priority queue of Find_Actor_BFS.
+
+        Returns:
+            np.ndarray: indices of discovered actors with parent_movie set
+        """
+        graph = self.graph
+        actors = np.flatnonzero(self.frontier)
+        actors = actors[np.argsort(-graph.movie_counts[actors], kind="stable")]
+
+        movies, owners = gather(graph.actor_offsets, graph.actor_movies, actors)
+        new = ~self.movie_visited[movies]
+        movies, owners = movies[new], owners[new]
+        movies, first = np.unique(movies, return_index=True)
+        order = np.argsort(first, kind="stable")
+        movies = movies[order]
+        self.movie_parent[movies] = actors[owners[first[order]]]
+        self.movie_visited[movies] = True
+
+        cast, owners = gather(graph.movie_offsets, graph.movie_actors, movies)
+        new = ~self.visited[cast]
+        cast, owners = cast[new], owners[new]
+        cast, first = np.unique(cast, return_index=True)
+        self.parent_movie[cast] = movies[owners[first]]
+        return cast
+
+    def step_bottom_up(self):
+        """Checks every unexpanded movie and unvisited actor for parent in frontier
+
+        Returns:
+            np.ndarray: indices of discovered actors with parent_movie set
+        """
+        graph = self.graph
+        movies = np.flatnonzero(~self.movie_visited)
+        cast, owners = gather(graph.movie_offsets, graph.movie_actors, movies)
+        hits = np.flatnonzero(self.frontier[cast])
+        reached, first = np.unique(owners[hits], return_index=True)
+        movies = movies[reached]
+        self.movie_parent[movies] = cast[hits[first]]
+        self.movie_visited[movies] = True
+
+        new_movies = np.zeros(graph.num_movies, dtype=bool)
+        new_movies[movies] = True
+        actors = np.flatnonzero(~self.visited)
+        films, owners = gather(graph.actor_offsets, graph.actor_movies, actors)
+        hits = np.flatnonzero(new_movies[films])
+        found, first = np.unique(owners[hits], return_index=True)
+        cast = actors[found]
+        self.parent_movie[cast] = films[hits[first]]
+        return cast
+
+    def run(self, goal: int | None = None, max_layer: int | None = None):
+        """Expands layers until goal is found, max_layer is reached or graph is exhausted
+
+        Returns:
+            bool: True if goal was found (or all reachable actors when goal is None)
+        """
+        while goal is None or not self.visited[goal]:
+            if max_layer is not None and self.layer >= max_layer:
+                return False
+            if not self.step().size:
+                return goal is None
+        return True
+
+    def path(self, actor: int):
+        """Rebuilds path from predecessor arrays
+
+        Args:
+            actor (int): index of visited actor
+
+        Returns:
+            list: pairs of (movie index, actor index) from actor after source to given actor
+        """
+        return follow_parents(self.source, self.parent_actor, self.parent_movie, actor)
+
+
+def follow_parents(source: int, parent_actor: np.ndarray, parent_movie: np.ndarray, actor: int):
+    """Rebuilds path from predecessor arrays
+
+    Returns:
+        list: pairs of (movie index, actor index) from actor after source to given actor
+    """
+    path = []
+    while actor != source:
+        path.append((int(parent_movie[actor]), int(actor)))
+        actor = parent_actor[actor]
+    path.reverse()
+    return path
+
+
+def center_path(center_id: int):
+    return os.path.join(data_dir, f"center_{center_id}.bin")
+
+
+class Center_tree:
+    def __init__(
+        self,
+        center: int,
+        distance: np.ndarray,
+        parent_actor: np.ndarray,
+        parent_movie: np.ndarray,
+        dataset: str | None = None,
+    ) -> None:
+        """Init of Center_tree class
+
+        Shortest path tree of whole graph from center actor, so path between
+        center and any actor is a chain of parent lookups.
+
+        Args:
+            center (int): index of center actor
+            distance (np.ndarray): hops from center to every actor, -1 if unreachable
+            parent_actor (np.ndarray): previous actor on path from center
+            parent_movie (np.ndarray): movie shared with previous actor
+            dataset (str | None): version of data of graph
+        """
+        self.center = center
+        self.distance = distance
+        self.parent_actor = parent_actor
+        self.parent_movie = parent_movie
+        self.dataset = dataset
+
+    @classmethod
+    def compute(cls, graph: Cast_graph, center: int):
+        search = Graph_BFS(graph, center)
+        search.run()
+        return cls(center, search.distance, search.parent_actor, search.parent_movie, graph.dataset)
+
+    def save(self, file_path: str):
+        arrays = {
+            "distance": self.distance,
+            "parent_actor": self.parent_actor,
+            "parent_movie": self.parent_movie,
+        }
+        write_arrays(file_path, arrays, {"dataset": self.dataset, "center": self.center})
+
+    @classmethod
+    def open(cls, file_path: str):
+        arrays, meta = open_arrays(file_path)
+        try:
+            return cls(
+                meta["center"],
+                arrays["distance"],
+                arrays["parent_actor"],
+                arrays["parent_movie"],
+                meta["dataset"],
+            )
+        except KeyError as e:
+            raise Snapshot_error(f"{file_path} is missing {e}")
+
+    def reaches(self, actors: np.ndarray):
+        """Checks if any of actors is connected with center"""
+        return bool((np.asarray(self.distance)[actors] >= 0).any())
+
+    def remap(self, old: Cast_graph, new: Cast_graph):
+        """Same tree in actor and movie indices of new graph
+
+        Valid only when cast of movies of actors connected with center didn't
+        change, so they keep their distances and parents.
+
+        Args:
+            old (Cast_graph): graph tree was computed on
+            new (Cast_graph): graph rebuilt from changed cast
+
+        Returns:
+            Center_tree: tree of new graph
+        """
+        indices = old.actor_indices(new.actor_ids)
+        present = indices >= 0
+        distance = np.full(new.num_actors, -1, dtype=np.int16)
+        parent_actor = np.full(new.num_actors, -1, dtype=np.int32)
+        parent_movie = np.full(new.num_actors, -1, dtype=np.int32)
+        distance[present] = np.asarray(self.distance)[indices[present]]
+        has_parent = present & (distance > 0)
+        parents = np.asarray(self.parent_actor)[indices[has_parent]]
+        movies = np.asarray(self.parent_movie)[indices[has_parent]]
+        parent_actor[has_parent] = new.actor_indices(old.actor_ids[parents])
+        parent_movie[has_parent] = new.movie_indices(old.movie_ids[movies])
+        center = int(new.actor_indices([old.actor_id(self.center)])[0])
+        return Center_tree(center, distance, parent_actor, parent_movie, new.dataset)
+
+    def path(self, actor: int):
+        """Path from center to actor or None if actor is not connected with center"""
+        if self.distance[actor] < 0:
+            return None
+        return follow_parents(self.center, self.parent_actor, self.parent_movie, actor)
+
+    def to_frame(self, graph: Cast_graph):
+        """Rows of degrees table for every actor connected with center"""
+        actors = np.flatnonzero(self.distance >= 0)
+        parents = np.asarray(self.parent_actor)[actors]
+        movies = np.asarray(self.parent_movie)[actors]
+        has_parent = parents >= 0
+
+        def ids(table, indices):
+            return pd.Series(table[indices], dtype="Int64").where(has_parent)
+
+        return pd.DataFrame(
+            {
+                "center_id": graph.actor_id(self.center),
+                "actor_id": graph.actor_ids[actors],
+                "distance": np.asarray(self.distance)[actors],
+                "parent_id": ids(graph.actor_ids, parents),
+                "movie_id": ids(graph.movie_ids, movies),
+            }
+        )
+
+
+class Landmarks:
+    UNREACHABLE = 255
+
+    def __init__(self, actors: np.ndarray, distances: np.ndarray, dataset: str | None = None) -> None:
+        """Init of Landmarks class
+
+        Distances from a few landmark actors give bounds of distance between
+        any two actors from triangle inequality.
+
+        Args:
+            actors (np.ndarray): indices of landmark actors
+            distances (np.ndarray): (actors x landmarks) hops to every landmark, 255 if unreachable
+            dataset (str | None): version of data of graph
+        """
+        self.actors = actors
+        self.distances = distances
+        self.dataset = dataset
+
+    @classmethod
+    def compute(cls, graph: Cast_graph, count: int = 16, actors: Iterable | None = None):
+        """Runs full search from every landmark
+
+        Args:
+            graph (Cast_graph): graph to search
+            count (int): number of landmarks with the most movies, used when actors is None. Defaults to 16.
+            actors (Iterable | None): indices of landmark actors
+
+        Returns:
+            Landmarks: landmarks instance
+        """
+        if actors is None:
+            actors = np.argsort(-graph.movie_counts, kind="stable")[:count]
+        actors = np.asarray(actors, dtype=np.int32)
+        distances = np.full((graph.num_actors, len(actors)), cls.UNREACHABLE, dtype=np.uint8)
+        for i, actor in enumerate(actors):
+            search = Graph_BFS(graph, int(actor))
+            search.run()
+            reached = search.distance >= 0
+            distances[reached, i] = np.minimum(search.distance[reached], cls.UNREACHABLE - 1)
+        return cls(actors, distances, graph.dataset)
+
+    def update(self, old: Cast_graph, new: Cast_graph, changed: np.ndarray):
+        """Landmarks of new graph, searching again only from landmarks which reach changed actors
+
+        Distances of other landmarks are copied, as cast of their actors didn't change.
+
+        Args:
+            old (Cast_graph): graph landmarks were computed on
+            new (Cast_graph): graph rebuilt from changed cast
+            changed (np.ndarray): indices in old graph of actors of movies with changed cast
+
+        Returns:
+            tuple: (Landmarks of new graph or None when some landmark actor left graph,
+                number of landmarks searched again)
+        """
+        actors = new.actor_indices(old.actor_ids[self.actors]).astype(np.int32)
+        if (actors < 0).any():
+            return None, len(actors)
+        indices = old.actor_indices(new.actor_ids)
+        present = indices >= 0
+        distances = np.full((new.num_actors, len(actors)), self.UNREACHABLE, dtype=np.uint8)
+        searched = 0
+        for i, actor in enumerate(actors):
+            column = np.asarray(self.distances[:, i])
+            if (column[changed] == self.UNREACHABLE).all():
+                distances[present, i] = column[indices[present]]
+                continue
+            search = Graph_BFS(new, int(actor))
+            search.run()
+            reached = search.distance >= 0
+            distances[reached, i] = np.minimum(search.distance[reached], self.UNREACHABLE - 1)
+            searched += 1
+        return Landmarks(actors, distances, new.dataset), searched
+
+    def save(self, file_path: str = landmarks_path):
+        write_arrays(
+            file_path,
+            {"actors": self.actors, "distances": self.distances},
+            {"dataset": self.dataset},
+        )
+
+    @classmethod
+    def open(cls, file_path: str = landmarks_path):
+        arrays, meta = open_arrays(file_path)
+        try:
+            return cls(arrays["actors"], arrays["distances"], meta["dataset"])
+        except KeyError as e:
+            raise Snapshot_error(f"{file_path} is missing {e}")
+
+    def bounds(self, source: int, goal: int):
+        """Bounds of number of hops between two actors
+
+        Returns:
+            tuple: (lower bound, upper bound or None); lower bound is None when
+                some landmark reaches only one of actors, so they are not connected
+        """
+        source_distances = self.distances[source].astype(np.int16)
+        goal_distances = self.distances[goal].astype(np.int16)
+        source_reached = source_distances != self.UNREACHABLE
+        goal_reached = goal_distances != self.UNREACHABLE
+        if (source_reached != goal_reached).any():
+            return None, None
+        if not source_reached.any():
+            return 0, None
+        source_distances, goal_distances = source_distances[source_reached], goal_distances[goal_reached]
+        lower = int(np.abs(source_distances - goal_distances).max())
+        upper = int((source_distances + goal_distances).min())
+        return lower, upper
+
+    def heuristic(self, actors: np.ndarray, goal: int):
+        """Lower bounds of hops from actors to goal
+
+        Returns:
+            np.ndarray: lower bound for every actor, -1 for actors which can't reach goal
+        """
+        distances = self.distances[actors].astype(np.int16)
+        goal_distances = self.distances[goal].astype(np.int16)
+        goal_reached = goal_distances != self.UNREACHABLE
+        reached = distances != self.UNREACHABLE
+        lower = np.where(reached & goal_reached, np.abs(distances - goal_distances), 0).max(axis=1, initial=0)
+        lower[(reached != goal_reached).any(axis=1)] = -1
+        return lower
+
+
+@functools.lru_cache(maxsize=None)
+def get_landmarks():
+    """Loads landmarks once per process
+
+    Returns:
+        Landmarks | None: landmarks of current graph or None if there are none or they are stale
+    """
+    graph = get_graph()
+    if graph.dataset is None or not os.path.exists(landmarks_path):
+        return None
+    try:
+        landmarks = Landmarks.open(landmarks_path)
+    except Snapshot_error as e:
+        print(f"Ignoring landmarks: {e}")
+        return None
+    if landmarks.dataset != graph.dataset or len(landmarks.distances) != graph.num_actors:
+        print("Ignoring landmarks: graph changed")
+        return None
+    return landmarks
+
+
+@functools.lru_cache(maxsize=None)
+def get_center_trees():
+    """Loads shortest path trees of all center actors once per process
+
+    Returns:
+        dict: index of center actor -> Center_tree, stale trees are skipped
+    """
+    graph = get_graph()
+    trees = {}
+    if graph.dataset is None:
+        return trees
+    for file in sorted(os.listdir(data_dir)):
+        if not (file.startswith("center_") and file.endswith(".bin")):
+            continue
+        try:
+            tree = Center_tree.open(os.path.join(data_dir, file))
+        except Snapshot_error as e:
+            print(f"Ignoring center tree: {e}")
+            continue
+        if tree.dataset == graph.dataset and len(tree.distance) == graph.num_actors:
+            trees[tree.center] = tree
+    return trees
+
+
+@functools.lru_cache(maxsize=None)
+def get_graph():
+    """Loads co-star graph once per process
+
+    Graph snapshot is used unless it is older than transformed cast,
+    otherwise graph is built from cast files if present or from cast table.
+
+    Returns:
+        Cast_graph: graph instance
+    """
+    cast_exists = table_exists(transformed_dir, "cast")
+    if os.path.exists(snapshot_path):
+        try:
+            graph = Cast_graph.open(snapshot_path)
+        except Snapshot_error as e:
+            print(f"Ignoring graph snapshot: {e}")
+        else:
+            if not cast_exists or graph.dataset == table_version(transformed_dir, "cast"):
+                return graph
+            print("Ignoring graph snapshot: transformed data changed")
+
+    if cast_exists:
+        return Cast_graph.from_csv(transformed_dir)
+
+    from .database import get_session
+
+    with get_session() as session:
+        return Cast_graph.from_session(session)
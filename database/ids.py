@@ -0,0 +1,40 @@
+import numpy as np
+import pandas as pd
+
+MOVIE_PREFIX = "tt"
+ACTOR_PREFIX = "nm"
+
+
+def to_key(imdb_id: str):
+    """Integer key of tconst or nconst, e.g. nm0000102 -> 102"""
+    return int(imdb_id[2:])
+
+
+def to_keys(imdb_ids: pd.Series):
+    """Vectorized to_key"""
+    return imdb_ids.str.slice(2).astype(np.int64)
+
+
+def parse_key(value: str):
+    """Integer key of IMDb id or of already converted key, e.g. nm0000102 or 102 -> 102
+
+    Files written before ids became integers still hold IMDb ids.
+    """
+    if value[:2] in (MOVIE_PREFIX, ACTOR_PREFIX):
+        return to_key(value)
+    return int(value)
+
+
+def has_imdb_ids(values: pd.Series):
+    """Checks if any of text values is IMDb id instead of integer key"""
+    return bool(values.str.slice(0, 2).isin((MOVIE_PREFIX, ACTOR_PREFIX)).any())
+
+
+def movie_tconst(key: int):
+    """IMDb id of movie key, e.g. 1 -> tt0000001"""
+    return f"{MOVIE_PREFIX}{key:07d}"
+
+
+def actor_nconst(key: int):
+    """IMDb id of actor key, e.g. 102 -> nm0000102"""
+    return f"{ACTOR_PREFIX}{key:07d}"
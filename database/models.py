@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, ForeignKey, Float
+from sqlalchemy import Column, Integer, String, ForeignKey, Float, Index
 from sqlalchemy.orm import relationship, declarative_base
 
 Base = declarative_base()
@@ -9,8 +9,8 @@ class Movies(Base):
     __tablename__ = "movies"
 
     id = Column(
-        String, primary_key=True, nullable=False, index=True, autoincrement=False
-    )  # tconst
+        Integer, primary_key=True, nullable=False, index=True, autoincrement=False
+    )  # number of tconst
     original_title = Column(String, nullable=False)  # originalTitle
     start_year = Column(Integer)  # startYear
 
@@ -24,7 +24,7 @@ class Akas(Base):
     __tablename__ = "akas"
 
     id = Column(Integer, primary_key=True, autoincrement=True)
-    movie_id = Column(String, ForeignKey("movies.id", ondelete='CASCADE'), nullable=False)  # titleId
+    movie_id = Column(Integer, ForeignKey("movies.id", ondelete='CASCADE'), nullable=False)  # titleId
     title = Column(String, index=True, nullable=False)  # title
     region = Column(String, nullable=False)  # region
 
@@ -34,10 +34,13 @@ class Akas(Base):
 class Actors(Base):
     __tablename__ = "actors"
 
-    id = Column(String, index=True, primary_key=True, autoincrement=False)  # nconst
+    id = Column(Integer, index=True, primary_key=True, autoincrement=False)  # number of nconst
     name = Column(String, index=True, nullable=False)  # primaryName
     birth_year = Column(Float)  # birthYear
     death_year = Column(Float)  # deathYear
+    movie_count = Column(Integer)  # number of movies in cast
+    co_star_count = Column(Integer)  # number of distinct actors from common movies
+    component = Column(Integer)  # connected component of co-star graph, 0 is the largest
 
     cast = relationship("Cast", back_populates="actor" ,cascade='all, delete', passive_deletes=True)
 
@@ -47,8 +50,8 @@ class Cast(Base):
     __tablename__ = "cast"
 
     id = Column(Integer, index=True, primary_key=True, autoincrement=True)
-    movie_id = Column(String, ForeignKey("movies.id", ondelete='CASCADE'), index=True, nullable=False)
-    actor_id = Column(String, ForeignKey("actors.id", ondelete='CASCADE'), index=True, nullable=False)
+    movie_id = Column(Integer, ForeignKey("movies.id", ondelete='CASCADE'), index=True, nullable=False)
+    actor_id = Column(Integer, ForeignKey("actors.id", ondelete='CASCADE'), index=True, nullable=False)
     characters = Column(String)
 
     movie = relationship("Movies", back_populates="cast")
@@ -60,8 +63,21 @@ class Ratings(Base):
     __tablename__ = "ratings"
 
     id = Column(Integer, index=True, primary_key=True, autoincrement=True)
-    movie_id = Column(String, ForeignKey("movies.id", ondelete='CASCADE'), nullable=False)
+    movie_id = Column(Integer, ForeignKey("movies.id", ondelete='CASCADE'), nullable=False)
     average = Column(Float, nullable=False)
     num_votes = Column(Integer, nullable=False)
 
     movie = relationship("Movies", back_populates="rating")
+
+
+class Degrees(Base):
+    # shortest path tree from center actor, e.g. Bacon numbers
+    __tablename__ = "degrees"
+    __table_args__ = (Index("ix_degrees_center_actor", "center_id", "actor_id", unique=True),)
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    center_id = Column(Integer, ForeignKey("actors.id", ondelete='CASCADE'), nullable=False)
+    actor_id = Column(Integer, ForeignKey("actors.id", ondelete='CASCADE'), nullable=False)
+    distance = Column(Integer, nullable=False)  # number of movies between center and actor
+    parent_id = Column(Integer, ForeignKey("actors.id", ondelete='CASCADE'))  # previous actor on path from center
+    movie_id = Column(Integer, ForeignKey("movies.id", ondelete='CASCADE'))  # movie shared with parent
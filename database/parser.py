@@ -1,25 +1,67 @@
+import io
 import pandas as pd
+import numpy as np
 import os
 import functools
 import math
 import multiprocessing as mp
 import time
 import shutil
-import tempfile
+import sys
 from sqlalchemy import create_engine
+from multiprocessing import shared_memory
 from multiprocessing.managers import BaseManager
 from typing import Iterable, Callable
 from dotenv import load_dotenv
 
 env_dir = os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir)
 load_dotenv(os.path.join(env_dir, '.env'))
-DATABASE_URL = f"postgresql+psycopg2://{os.getenv('DB_USER')}:{os.getenv('DB_PASSWORD')}@{os.getenv('DB_ADDRESS')}:5432/star_connectionsdb"
-
+sys.path.insert(0, env_dir)
+from database.graph import Cast_graph, Center_tree, Landmarks, Snapshot_error, center_path, snapshot_path, landmarks_path
+from database.constraints import Movie_attributes, movie_attributes_path
+from database.ids import ACTOR_PREFIX, MOVIE_PREFIX, has_imdb_ids, parse_key, to_key, to_keys
+from database.shards import (
+    FORMATS,
+    Shard_writer,
+    check_format,
+    format_of,
+    merge_table,
+    read_manifest,
+    read_shard,
+    read_table,
+    remove_table,
+    shard_name,
+    table_exists,
+    table_files,
+    table_version,
+    update_table,
+    write_manifest,
+    write_shard,
+)
 
-def init_pool_processes(the_lock):
-    """Initialize each process with a global variable lock."""
-    global lock
-    lock = the_lock
+# Columns identifying rows of every table when diffing two transformations;
+# movies and actors are updated in place, rows of other tables are replaced by key
+TABLE_KEYS = {
+    "movies": ["id"],
+    "actors": ["id"],
+    "cast": ["movie_id", "actor_id"],
+    "akas": ["movie_id", "region"],
+    "ratings": ["movie_id"],
+    "degrees": ["center_id", "actor_id"],
+}
+UPDATED_TABLES = ("movies", "actors")
+# Columns holding ids of movies and actors, IMDb ids in files of versions before integer keys
+ID_COLUMNS = {
+    "movies": ["id"],
+    "actors": ["id"],
+    "cast": ["movie_id", "actor_id"],
+    "akas": ["movie_id"],
+    "ratings": ["movie_id"],
+    "degrees": ["center_id", "actor_id", "parent_id", "movie_id"],
+}
+# Tables written by transforming processes, in order of publishing streamed rows
+STREAMED_TABLES = ("movies", "actors", "cast", "akas", "ratings")
+DATABASE_URL = f"postgresql+psycopg2://{os.getenv('DB_USER')}:{os.getenv('DB_PASSWORD')}@{os.getenv('DB_ADDRESS')}:5432/star_connectionsdb"
 
 
 def print_status(func):
@@ -38,40 +80,184 @@ def print_status(func):
     return wrapper
 
 
+def actor_degrees(cast: pd.DataFrame):
+    """Counts movies and distinct co-stars of every actor of cast frame
+
+    Returns:
+        tuple: series (movie_count, co_star_count) indexed by actor_id
+    """
+    cast = cast[["movie_id", "actor_id"]].drop_duplicates()
+    movie_count = cast.groupby("actor_id").size()
+    co_stars = cast.merge(cast, on="movie_id", suffixes=("", "_co_star"))
+    co_stars = co_stars[co_stars["actor_id"] != co_stars["actor_id_co_star"]]
+    co_star_count = co_stars.groupby("actor_id")["actor_id_co_star"].nunique()
+    return movie_count, co_star_count
+
+
 class Counter(object):
     def __init__(self, initval=0):
-        self.val = mp.Value("i", initval)
+        self.val = mp.Value("q", initval)
         self.lock = mp.Lock()
 
     def value(self):
         with self.lock:
             return self.val.value
 
-    def increment(self):
+    def increment(self, step=1):
         with self.lock:
-            self.val.value += 1
+            self.val.value += step
+            return self.val.value
+
+
+class Range_reader(io.RawIOBase):
+    def __init__(self, file_path: str, start: int, end: int) -> None:
+        """Init of Range_reader class
+
+        Binary file limited to bytes from start to end, so parser of one
+        worker sees only its own part of file.
+
+        Args:
+            file_path (str): path of file
+            start (int): offset of first byte
+            end (int): offset after last byte
+        """
+        self.file = open(file_path, "rb")
+        self.file.seek(start)
+        self.remaining = end - start
+        self.position = 0
+
+    def readable(self):
+        return True
+
+    def readinto(self, buffer):
+        size = min(len(buffer), self.remaining)
+        if size <= 0:
+            return 0
+        read = self.file.readinto(memoryview(buffer)[:size])
+        self.remaining -= read
+        self.position += read
+        return read
+
+    def close(self):
+        self.file.close()
+        super().close()
+
+
+# blocks of shared filters attached by this process, kept open for following tasks
+attached_filters = {}
+
+
+class Shared_filter:
+    def __init__(self, ids: Iterable = ()) -> None:
+        """Init of Shared_filter class
+
+        Sorted ids in block of shared memory. Workers attach to the block
+        instead of receiving copy of set with every task, and test
+        membership locally with binary search.
+
+        Args:
+            ids (Iterable): ids in filter, duplicates are allowed
+        """
+        ids = np.unique(np.fromiter(ids, dtype=np.int64) if not isinstance(ids, np.ndarray) else ids.astype(np.int64))
+        self.size = len(ids)
+        self.owner = True
+        self.shm = shared_memory.SharedMemory(create=True, size=max(ids.nbytes, 1))
+        self.ids = np.ndarray(self.size, dtype=np.int64, buffer=self.shm.buf)
+        self.ids[:] = ids
+        self.ids.flags.writeable = False
+
+    def __getstate__(self):
+        return {"name": self.shm.name, "size": self.size}
+
+    def __setstate__(self, state):
+        self.size = state["size"]
+        self.owner = False
+        if state["name"] not in attached_filters:
+            attached_filters[state["name"]] = shared_memory.SharedMemory(name=state["name"])
+        self.shm = attached_filters[state["name"]]
+        self.ids = np.ndarray(self.size, dtype=np.int64, buffer=self.shm.buf)
+        self.ids.flags.writeable = False
+
+    def __len__(self):
+        return self.size
+
+    def __iter__(self):
+        return iter(self.ids.tolist())
+
+    def isin(self, values):
+        """Vectorized membership of values in filter"""
+        values = np.asarray(values, dtype=np.int64)
+        if not self.size:
+            return np.zeros(len(values), dtype=bool)
+        indices = np.searchsorted(self.ids, values)
+        indices[indices == self.size] = 0
+        return self.ids[indices] == values
+
+    def release(self):
+        """Closes block of filter and frees it, if filter was created in this process"""
+        if self.ids is None:
+            return
+        self.ids = None
+        self.shm.close()
+        if self.owner:
+            self.shm.unlink()
 
 
 class Parser:
     class CustomManager(BaseManager):
         pass
 
-    def __init__(self, db_url) -> None:
+    def __init__(
+        self,
+        db_url,
+        num_processes: int = mp.cpu_count(),
+        chunksize: int | None = None,
+        block_size: int = 64 * 2**20,
+        file_format: str = "csv",
+    ) -> None:
+        """Init of Parser class
+
+        Args:
+            db_url (str): url of database
+            num_processes (int): number of transforming processes. Defaults to mp.cpu_count().
+            chunksize (int | None): rows parsed at once by every process, overrides
+                defaults of files. Peak memory grows with num_processes * chunksize.
+            block_size (int): maximal size of byte range of file given to process at once.
+                Defaults to 64 MiB.
+            file_format (str): format of transformed files, csv or typed and compressed
+                columns of parquet (requires pyarrow). Defaults to "csv".
+        """
+        check_format(file_format)
         self.data_dir = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data")
         self.raw_dir = os.path.join(self.data_dir, "raw")
         self.transformed_dir = os.path.join(self.data_dir, "transformed")
+        self.previous_dir = os.path.join(self.data_dir, "previous")
         self.database_url = db_url
         if not os.path.exists(self.transformed_dir):
             os.mkdir(self.transformed_dir)
-        self.CustomManager.register("set", set)
         self.CustomManager.register("Counter", Counter)
-        self.title_filter = set()
-        self.name_filter = set()
-        self.current_chunk = 0
-        self.num_records = 0
+        self.title_filter = None
+        self.name_filter = None
+        self.num_processes = num_processes
+        self.chunksize = chunksize
+        self.block_size = block_size
+        self.file_format = file_format
+        self.bytes_read = 0
+        self.num_bytes = 0
+        self.shard = 0
+        self.shards = {}
+        self.stream = False
+        self.streamed = {}
+        self.cursor = None
+        self.previous_graph = None
+        self.changed = None
 
     def chunk_loader(
-        self, file: str, cols: Iterable | None = None, chunksize: int = 1000
+        self,
+        file,
+        cols: Iterable | None = None,
+        chunksize: int = 1000,
+        names: list | None = None,
     ):
         for chunk in pd.read_csv(
             file,
@@ -79,63 +265,274 @@ class Parser:
             chunksize=chunksize,
             na_values="\\N",
             usecols=cols,
+            header=None if names else "infer",
+            names=names,
+            encoding="UTF-8",
         ):
             yield chunk
 
     def load_to_db(
         self,
-        file_path,
+        files: Iterable,
         table: str,
+        replace: bool = False,
     ):
+        """Copies all files of table through one connection and commits once
+
+        Table gets either all of its shards or none of them. With replace
+        its current rows are deleted in the same transaction.
+        """
+        conn = create_engine(self.database_url).raw_connection()
+        cursor = conn.cursor()
         try:
-            with open(file_path, encoding="UTF-8") as file:
-                conn = create_engine(self.database_url).raw_connection()
-                cursor = conn.cursor()
-                cmd = f'COPY "{table}"({file.readline()}) FROM STDIN WITH (FORMAT CSV, HEADER FALSE)'
-                cursor.copy_expert(cmd, file)
-                conn.commit()
+            if replace:
+                cursor.execute(f'DELETE FROM "{table}"')
+            for file_path in files:
+                if format_of(file_path) == "parquet":
+                    # COPY reads csv, so parquet file is exported to it in memory
+                    self.copy_frame(cursor, read_shard(file_path), table)
+                else:
+                    with open(file_path, encoding="UTF-8") as file:
+                        cmd = f'COPY "{table}"({file.readline()}) FROM STDIN WITH (FORMAT CSV, HEADER FALSE)'
+                        cursor.copy_expert(cmd, file)
+            conn.commit()
         except Exception as e:
+            conn.rollback()
             raise Exception(f"Couldn't load data to table {table}. Error: {e}")
         finally:
             cursor.close()
             conn.close()
 
     def save_to_file(self, chunk: pd.DataFrame, table: str):
-        file_path = os.path.join(self.transformed_dir, f"{table}.csv")
-
-        lock.acquire()
-        with open(file_path, "a", encoding="UTF-8") as f:
-            if f.tell() == 0:
-                chunk.to_csv(f, header=True, index=False, lineterminator="\n")
-                lock.release()
-                return
-            chunk.to_csv(f, header=False, index=False, lineterminator="\n")
-        lock.release()
-
-    def print_chunk_info(self, size):
-        self.current_chunk.increment()
-        message = f"Processing chunk: {self.current_chunk.value()}/{math.ceil(self.num_records/size)}"
+        """Appends chunk to shard of table owned by current task, so writers never wait
+
+        When streaming, chunk is copied to staging table through connection
+        of current task instead.
+        """
+        if self.stream:
+            self.copy_frame(self.cursor, chunk, f"stream_{table}")
+            shard = self.shards.setdefault(table, {"rows": 0, "columns": list(chunk.columns)})
+            shard["rows"] += len(chunk)
+            return
+        if table not in self.shards:
+            file = shard_name(table, self.shard, self.file_format)
+            self.shards[table] = {
+                "file": file,
+                "rows": 0,
+                "handle": Shard_writer(os.path.join(self.transformed_dir, file), table),
+            }
+        shard = self.shards[table]
+        shard["handle"].write(chunk)
+        shard["rows"] += len(chunk)
+
+    def print_progress(self, size):
+        bytes_read = self.bytes_read.increment(size)
+        message = f"Processed: {bytes_read/2**20:.1f}/{self.num_bytes/2**20:.1f} MiB ({bytes_read/max(self.num_bytes, 1):.0%})"
         print("\r" + " " * len(message), end="", flush=True)
         print(f"\r{message}" + " " * 6, end="", flush=True)
 
+    def byte_ranges(self, file_path: str, num_processes: int):
+        """Splits file after header into byte ranges aligned to line boundaries
+
+        Every range ends right after newline, so records are never split
+        between processes. Ranges are small enough to give every process
+        a few of them.
+
+        Returns:
+            tuple: (column names from header, list of (start, end) offsets)
+        """
+        size = os.path.getsize(file_path)
+        with open(file_path, "rb") as f:
+            names = f.readline().decode("UTF-8").rstrip("\r\n").split("\t")
+            start = f.tell()
+            block_size = max(1, min(self.block_size, math.ceil((size - start) / (num_processes * 4))))
+            ranges = []
+            while start < size:
+                f.seek(min(start + block_size, size) - 1)
+                f.readline()
+                end = f.tell()
+                ranges.append((start, end))
+                start = end
+        return names, ranges
+
+    def transform_range(
+        self,
+        func: Callable,
+        index: int,
+        file_path: str,
+        start: int,
+        end: int,
+        names: list,
+        cols: Iterable | None,
+        chunksize: int,
+    ):
+        """Parses byte range of file in chunks and transforms them in this process
+
+        Rows saved by func go to shards numbered by index of range, so
+        shards keep order of source file. When streaming, rows are copied
+        to staging tables in one transaction of this range; next chunk is
+        parsed only after database accepted previous one.
+
+        Returns:
+            tuple: (sorted unique ids returned by func for all chunks or None,
+                dict table -> shard ({"file", "rows"} or {"rows", "columns"}) written by this range)
+        """
+        self.shard = index
+        self.shards = {}
+        reader = Range_reader(file_path, start, end)
+        consumed = 0
+        collected = []
+        if self.stream:
+            conn = create_engine(self.database_url).raw_connection()
+            self.cursor = conn.cursor()
+        try:
+            with io.BufferedReader(reader) as f:
+                for chunk in self.chunk_loader(f, cols, chunksize, names):
+                    ids = func(chunk)
+                    if ids is not None:
+                        collected.append(ids)
+                    self.print_progress(reader.position - consumed)
+                    consumed = reader.position
+            if self.stream:
+                conn.commit()
+        finally:
+            for shard in self.shards.values():
+                if "handle" in shard:
+                    shard.pop("handle").close()
+            if self.stream:
+                self.cursor.close()
+                conn.close()
+                self.cursor = None
+        if end - start > consumed:
+            self.print_progress(end - start - consumed)
+        # ids repeat across chunks (e.g. actor in many movies), so range returns each once
+        return (np.unique(np.concatenate(collected)) if collected else None), self.shards
+
     @print_status
     def multi_process_transform(
         self,
         func: Callable,
         file: str,
         chunksize: int = 1000,
-        num_processes: int = mp.cpu_count(),
+        num_processes: int | None = None,
         cols: Iterable | None = None,
     ):
+        """Transforms file in pool of processes, each parsing its own byte ranges
+
+        Parent only finds line boundaries, so no rows are pickled between
+        processes and every process holds at most one chunk at once. Every
+        range is written to its own shards recorded in manifest of transformed
+        directory, or streamed to staging tables of database. Ids returned by
+        func are collected in processes and merged at the end.
+
+        Args:
+            func (Callable): transforming function called with every chunk
+            file (str): name of file in raw directory
+            chunksize (int): rows parsed at once, overridden by chunksize of parser. Defaults to 1000.
+            num_processes (int | None): size of pool. Defaults to num_processes of parser.
+            cols (Iterable | None): columns to parse. Defaults to all.
+
+        Returns:
+            np.ndarray: sorted unique ids returned by func
+        """
         file_path = os.path.join(self.raw_dir, file)
+        num_processes = num_processes or self.num_processes
+        chunksize = self.chunksize or chunksize
+
+        names, ranges = self.byte_ranges(file_path, num_processes)
+        self.num_bytes = sum(end - start for start, end in ranges)
+        tasks = [
+            (func, index, file_path, start, end, names, cols, chunksize)
+            for index, (start, end) in enumerate(ranges)
+        ]
+        with mp.Pool(processes=num_processes) as pool:
+            results = pool.starmap(self.transform_range, tasks, chunksize=1)
+
+        tables = {}
+        for _, shards in results:
+            for table, shard in shards.items():
+                tables.setdefault(table, []).append(shard)
+        for table, shards in tables.items():
+            if self.stream:
+                self.streamed[table] = {
+                    "rows": sum(shard["rows"] for shard in shards),
+                    "columns": shards[0]["columns"],
+                }
+            else:
+                write_manifest(self.transformed_dir, table, shards)
+
+        collected = [ids for ids, _ in results if ids is not None]
+        if not collected:
+            return np.empty(0, dtype=np.int64)
+        return np.unique(np.concatenate(collected))
+
+    def merge_shards(self):
+        """Rebuilds single file of every sharded table in order of source files"""
+        for table in read_manifest(self.transformed_dir):
+            merge_table(self.transformed_dir, table)
+
+    def save_filter(self, name: str, ids: Shared_filter):
+        """Writes ids of filter, so later runs can reuse them without transforming their file"""
+        if self.file_format == "parquet":
+            file_path = os.path.join(self.data_dir, f"{name}_filter.parquet")
+            write_shard(pd.DataFrame({"id": ids.ids}), file_path)
+            return
+        with open(os.path.join(self.data_dir, f"{name}_filter.csv"), "w", encoding="utf-8") as f:
+            f.write(",".join(map(str, ids)))
+
+    def load_filter(self, name: str):
+        """Reads ids of filter written by previous run, None if there is no such file"""
+        for file_format in (self.file_format, *FORMATS):
+            file_path = os.path.join(self.data_dir, f"{name}_filter.{file_format}")
+            if not os.path.exists(file_path):
+                continue
+            if file_format == "parquet":
+                return read_shard(file_path, usecols=["id"])["id"].to_numpy(np.int64)
+            with open(file_path, encoding="UTF-8") as f:
+                return np.fromiter(map(parse_key, f.readline().split(",")), dtype=np.int64)
+        return None
+
+    def convert_ids(self, directory: str):
+        """Replaces IMDb ids in transformed files written before ids became integer keys
+
+        Only csv files can hold them. Actors of such files have no movie and
+        co-star counts nor components, those stay empty until data is
+        transformed again.
+        """
+        for table, columns in ID_COLUMNS.items():
+            files = table_files(directory, table)
+            if not files or format_of(files[0]) != "csv":
+                continue
+            first = pd.read_csv(files[0], nrows=1, dtype=str, keep_default_na=False)
+            if not any(has_imdb_ids(first[column]) for column in columns if column in first):
+                continue
+
+            def to_integer_keys(frame: pd.DataFrame):
+                for column in columns:
+                    if column in frame:
+                        ids = frame[column]
+                        prefixed = ids.str.slice(0, 2).isin((MOVIE_PREFIX, ACTOR_PREFIX))
+                        frame.loc[prefixed, column] = to_keys(ids[prefixed]).astype(str)
+                return frame
 
-        with open(file_path, encoding="UTF-8") as f:
-            self.num_records = sum(1 for _ in f)
-        lock = mp.Lock()
-        with mp.Pool(
-            processes=num_processes, initializer=init_pool_processes, initargs=(lock,)
-        ) as pool:
-            pool.map(func, self.chunk_loader(file_path, cols, chunksize))
+            print(f"Converting IMDb ids of {table} in {directory}", flush=True)
+            update_table(directory, table, to_integer_keys)
+
+    def check_database(self):
+        """Raises exception when tables of database were created with IMDb ids as text keys"""
+        types = self.read_query(
+            "SELECT data_type FROM information_schema.columns "
+            "WHERE table_name = 'movies' AND column_name = 'id'"
+        )["data_type"]
+        if types.isin(["character varying", "text"]).any():
+            raise Exception(
+                "Tables of database have text ids of previous version. Drop them and create "
+                "them again with init_db.py (or database.database.create_tables), then load data."
+            )
+
+    def release_filters(self):
+        self.title_filter.release()
+        self.name_filter.release()
 
     def load_all(self, ignore_files: Iterable = []):
         transformed_files = [
@@ -144,6 +541,7 @@ class Parser:
             "cast.csv",
             "akas.csv",
             "ratings.csv",
+            "degrees.csv",
         ]
 
         files = filter(lambda x: x not in ignore_files, transformed_files)
@@ -151,10 +549,9 @@ class Parser:
         for file in files:
             print(f"Starting loading data {file}", flush=True)
             start_time = time.time_ns()
+            table = file.rsplit(".csv", 1)[0]
             try:
-                self.load_to_db(
-                    os.path.join(self.transformed_dir, file), file.rsplit(".csv", 1)[0]
-                )
+                self.load_to_db(table_files(self.transformed_dir, table), table)
             except Exception as e:
                 print(e, flush=True)
             else:
@@ -163,6 +560,286 @@ class Parser:
                     f"Data {file} loaded. Runtime: {(time.time_ns() - start_time)/1e9:.3f}", flush=True
                 )
 
+    def diff_table(self, table: str):
+        """Compares transformed table with the one loaded by previous run
+
+        Returns:
+            tuple: frames (inserted rows, updated rows, keys of deleted rows); for
+                tables outside UPDATED_TABLES changed keys are deleted and all their
+                new rows are inserted. Table missing on one side has all rows
+                inserted or deleted.
+        """
+        key = TABLE_KEYS[table]
+        frames = [
+            read_table(directory, table, dtype=str, keep_default_na=False)
+            if table_exists(directory, table)
+            else None
+            for directory in (self.transformed_dir, self.previous_dir)
+        ]
+        if all(frame is None for frame in frames):
+            empty = pd.DataFrame(columns=key, dtype=str)
+            return empty, empty, empty
+        columns = list(next(frame for frame in frames if frame is not None).columns)
+        new, old = [
+            pd.DataFrame(columns=columns, dtype=str) if frame is None else frame for frame in frames
+        ]
+
+        if table in UPDATED_TABLES:
+            merged = new.merge(old, on=key, how="outer", suffixes=("", "_old"), indicator=True)
+            inserted = merged.loc[merged["_merge"] == "left_only", columns]
+            deleted = merged.loc[merged["_merge"] == "right_only", key]
+            both = merged[merged["_merge"] == "both"]
+            values = [column for column in columns if column not in key]
+            changed = np.zeros(len(both), dtype=bool)
+            for column in values:
+                changed |= (both[column] != both[f"{column}_old"]).to_numpy()
+            return inserted, both.loc[changed, columns], deleted
+
+        rows = new.merge(old, how="outer", indicator=True)
+        changed_keys = rows.loc[rows["_merge"] != "both", key].drop_duplicates()
+        deleted = changed_keys.merge(old[key].drop_duplicates())
+        inserted = new.merge(changed_keys)
+        return inserted, inserted.iloc[0:0], deleted
+
+    def copy_frame(self, cursor, frame: pd.DataFrame, table: str):
+        buffer = io.StringIO()
+        frame.to_csv(buffer, header=False, index=False, lineterminator="\n")
+        buffer.seek(0)
+        columns = ",".join(f'"{column}"' for column in frame.columns)
+        cursor.copy_expert(f'COPY "{table}"({columns}) FROM STDIN WITH (FORMAT CSV, HEADER FALSE)', buffer)
+
+    def stage(self, cursor, frame: pd.DataFrame, table: str):
+        """Copies frame to temporary table with columns of table"""
+        stage = f"stage_{table}"
+        columns = ",".join(f'"{column}"' for column in frame.columns)
+        cursor.execute(f'DROP TABLE IF EXISTS "{stage}"')
+        cursor.execute(f'CREATE TEMP TABLE "{stage}" AS SELECT {columns} FROM "{table}" LIMIT 0')
+        self.copy_frame(cursor, frame, stage)
+        return stage
+
+    def load_changes(self):
+        """Applies only inserts, updates and deletes since previous run to database
+
+        All tables change in one transaction. Parents are inserted and updated
+        first, rows of other tables are replaced by key, and removed movies
+        and actors are deleted last, cascading to their remaining rows.
+        """
+        changes = {}
+        for table in TABLE_KEYS:
+            changes[table] = self.diff_table(table)
+            inserted, updated, deleted = changes[table]
+            print(
+                f"{table}: {len(inserted)} inserted, {len(updated)} updated, {len(deleted)} deleted",
+                flush=True,
+            )
+
+        conn = create_engine(self.database_url).raw_connection()
+        cursor = conn.cursor()
+        try:
+            for table in UPDATED_TABLES:
+                inserted, updated, _ = changes[table]
+                if len(updated):
+                    stage = self.stage(cursor, updated, table)
+                    key = TABLE_KEYS[table]
+                    values = ", ".join(f'"{c}" = s."{c}"' for c in updated.columns if c not in key)
+                    match = " AND ".join(f't."{c}" = s."{c}"' for c in key)
+                    cursor.execute(f'UPDATE "{table}" t SET {values} FROM "{stage}" s WHERE {match}')
+                if len(inserted):
+                    self.copy_frame(cursor, inserted, table)
+
+            for table in TABLE_KEYS:
+                if table in UPDATED_TABLES:
+                    continue
+                inserted, _, deleted = changes[table]
+                if len(deleted):
+                    stage = self.stage(cursor, deleted, table)
+                    match = " AND ".join(f't."{c}" = s."{c}"' for c in TABLE_KEYS[table])
+                    cursor.execute(f'DELETE FROM "{table}" t USING "{stage}" s WHERE {match}')
+                if len(inserted):
+                    self.copy_frame(cursor, inserted, table)
+
+            for table in reversed(UPDATED_TABLES):
+                _, _, deleted = changes[table]
+                if len(deleted):
+                    stage = self.stage(cursor, deleted, table)
+                    cursor.execute(f'DELETE FROM "{table}" t USING "{stage}" s WHERE t."id" = s."id"')
+            conn.commit()
+        except Exception as e:
+            conn.rollback()
+            raise Exception(f"Couldn't apply changes to database. Error: {e}")
+        finally:
+            cursor.close()
+            conn.close()
+
+    def keep_loaded(self):
+        """Keeps transformed tables as state of database for next incremental run"""
+        if os.path.exists(self.previous_dir):
+            shutil.rmtree(self.previous_dir)
+        os.mkdir(self.previous_dir)
+        for table in TABLE_KEYS:
+            merge_table(
+                self.transformed_dir, table, os.path.join(self.previous_dir, f"{table}.csv")
+            )
+
+    def changed_actors(self):
+        """Compares transformed cast with current graph snapshot, which is kept as previous_graph
+
+        Returns:
+            np.ndarray | None: indices in snapshot of actors of movies whose cast
+                changed, empty when cast didn't change, None when there is no snapshot
+        """
+        if not os.path.exists(snapshot_path):
+            return None
+        graph = Cast_graph.open(snapshot_path)
+        old = pd.DataFrame(
+            {
+                "movie_id": np.asarray(graph.movie_ids)[graph.actor_movies],
+                "actor_id": np.repeat(np.asarray(graph.actor_ids), graph.movie_counts),
+            }
+        )
+        new = read_table(
+            self.transformed_dir, "cast", usecols=["movie_id", "actor_id"]
+        ).drop_duplicates()
+        edges = new.merge(old, how="outer", indicator=True)
+        movies = edges.loc[edges["_merge"] != "both", "movie_id"].unique()
+        actors = pd.concat(
+            [
+                old.loc[old["movie_id"].isin(movies), "actor_id"],
+                new.loc[new["movie_id"].isin(movies), "actor_id"],
+            ]
+        ).unique()
+        indices = graph.actor_indices(actors)
+        self.previous_graph = graph
+        return np.unique(indices[indices >= 0])
+
+    def reuse_graph(self):
+        """Marks previous graph snapshot, landmarks and center trees as built from new cast file
+
+        Used when cast didn't change, so graph and all indexes derived from it stay valid.
+        """
+        version = table_version(self.transformed_dir, "cast")
+        files = [snapshot_path, landmarks_path] + [
+            os.path.join(self.data_dir, file)
+            for file in os.listdir(self.data_dir)
+            if file.startswith("center_") and file.endswith(".bin")
+        ]
+        for cls, file_path in zip([Cast_graph, Landmarks], files[:2]):
+            if os.path.exists(file_path):
+                derived = cls.open(file_path)
+                derived.dataset = version
+                derived.save(file_path)
+        for file_path in files[2:]:
+            tree = Center_tree.open(file_path)
+            tree.dataset = version
+            tree.save(file_path)
+        # previous run may have loaded no degrees, e.g. without centers
+        remove_table(self.transformed_dir, "degrees")
+        merge_table(
+            self.previous_dir,
+            "degrees",
+            os.path.join(self.transformed_dir, f"degrees.{self.file_format}"),
+        )
+
+    # -----------------------------------------
+    # Streaming FUNCTIONS
+    # -----------------------------------------
+    def create_stream_tables(self):
+        """Creates empty unlogged staging tables for rows streamed by transforming processes"""
+        conn = create_engine(self.database_url).raw_connection()
+        cursor = conn.cursor()
+        try:
+            for table in STREAMED_TABLES:
+                cursor.execute(f'DROP TABLE IF EXISTS "stream_{table}"')
+                cursor.execute(f'CREATE UNLOGGED TABLE "stream_{table}" AS SELECT * FROM "{table}" LIMIT 0')
+            conn.commit()
+        finally:
+            cursor.close()
+            conn.close()
+
+    def read_query(self, query: str, **kwargs):
+        """Reads result of query through COPY, kwargs are passed to pd.read_csv"""
+        conn = create_engine(self.database_url).raw_connection()
+        cursor = conn.cursor()
+        buffer = io.StringIO()
+        try:
+            cursor.copy_expert(f"COPY ({query}) TO STDOUT WITH (FORMAT CSV, HEADER TRUE)", buffer)
+        finally:
+            cursor.close()
+            conn.close()
+        buffer.seek(0)
+        return pd.read_csv(buffer, **kwargs)
+
+    def check_stream_actors(self):
+        """Removes streamed cast rows of actors missing in streamed actors"""
+        conn = create_engine(self.database_url).raw_connection()
+        cursor = conn.cursor()
+        try:
+            cursor.execute(
+                'DELETE FROM "stream_cast" c WHERE NOT EXISTS '
+                '(SELECT 1 FROM "stream_actors" a WHERE a."id" = c."actor_id")'
+            )
+            conn.commit()
+        finally:
+            cursor.close()
+            conn.close()
+
+    def build_stream_graph(self):
+        """Writes graph snapshot from streamed cast"""
+        cast = self.read_query(
+            'SELECT DISTINCT "movie_id", "actor_id" FROM "stream_cast"', dtype=np.int64
+        )
+        Cast_graph.from_frame(cast, f"stream-{time.time_ns()}").save(snapshot_path)
+        Cast_graph.open(snapshot_path, verify=True)
+
+    def publish_stream(self):
+        """Moves streamed rows from staging tables to tables, one transaction per table
+
+        Actors get movie and co-star counts and connected component on the
+        way, staging tables are dropped once their rows are published.
+        """
+        graph = Cast_graph.open(snapshot_path)
+        cast = self.read_query('SELECT "movie_id", "actor_id" FROM "stream_cast"', dtype=np.int64)
+        movie_count, co_star_count = actor_degrees(cast)
+        del cast
+        stats = pd.DataFrame({"id": np.asarray(graph.actor_ids)})
+        stats["movie_count"] = graph.movie_counts
+        stats["co_star_count"] = stats["id"].map(co_star_count).fillna(0).astype(int)
+        stats["component"] = np.asarray(graph.component)
+
+        conn = create_engine(self.database_url).raw_connection()
+        cursor = conn.cursor()
+        try:
+            for table in STREAMED_TABLES:
+                if table not in self.streamed:
+                    continue
+                start_time = time.time_ns()
+                columns = [f'"{column}"' for column in self.streamed[table]["columns"]]
+                if table == "actors":
+                    stage = self.stage(cursor, stats, table)
+                    values = ", ".join(f"a.{column}" for column in columns)
+                    cursor.execute(
+                        f'INSERT INTO "actors" ({", ".join(columns)}, "movie_count", "co_star_count", "component") '
+                        f'SELECT {values}, COALESCE(s."movie_count", 0), COALESCE(s."co_star_count", 0), s."component" '
+                        f'FROM "stream_actors" a LEFT JOIN "{stage}" s ON s."id" = a."id"'
+                    )
+                else:
+                    cursor.execute(
+                        f'INSERT INTO "{table}" ({", ".join(columns)}) SELECT {", ".join(columns)} FROM "stream_{table}"'
+                    )
+                rows = cursor.rowcount
+                cursor.execute(f'DROP TABLE "stream_{table}"')
+                conn.commit()
+                print(
+                    f"Data {table} loaded: {rows} rows. Runtime: {(time.time_ns() - start_time)/1e9:.3f}",
+                    flush=True,
+                )
+        except Exception as e:
+            conn.rollback()
+            raise Exception(f"Couldn't publish streamed data to table {table}. Error: {e}")
+        finally:
+            cursor.close()
+            conn.close()
+
     # -----------------------------------------
     # Transforming FUNCTIONS
     # -----------------------------------------
@@ -175,7 +852,6 @@ class Parser:
             "originalTitle": "original_title",
             "startYear": "start_year",
         }
-        self.print_chunk_info(chunk.shape[0])
         chunk_copy = chunk.rename(columns=column_mapping)
         movie_filter = (
             (chunk_copy["titleType"] == "movie")
@@ -185,18 +861,19 @@ class Parser:
         chunk_copy = chunk_copy[movie_filter]
         chunk_copy.drop(columns=["titleType"], inplace=True)
         chunk_copy.dropna(how="any", inplace=True)
+        chunk_copy["id"] = to_keys(chunk_copy["id"])
         chunk_copy["start_year"] = chunk_copy["start_year"].astype(int)
         if not chunk_copy.empty:
-            self.title_filter.update(chunk_copy["id"])
             self.save_to_file(chunk_copy, "movies")
+        return chunk_copy["id"].to_numpy(np.int64)
 
     def transform_title_akas(self, chunk: pd.DataFrame):
         column_mapping = {"titleId": "movie_id"}
 
-        self.print_chunk_info(chunk.shape[0])
         chunk_copy = chunk.rename(columns=column_mapping)
         chunk_copy.dropna(how="any", inplace=True)
-        akas_filter = (chunk_copy["movie_id"].isin(self.title_filter)) & (
+        chunk_copy["movie_id"] = to_keys(chunk_copy["movie_id"])
+        akas_filter = (self.title_filter.isin(chunk_copy["movie_id"])) & (
             chunk_copy["region"].isin(("PL", "US"))
         )
         chunk_copy = chunk_copy[akas_filter]
@@ -208,19 +885,20 @@ class Parser:
             "tconst": "movie_id",
             "nconst": "actor_id",
         }
-        self.print_chunk_info(chunk.shape[0])
         chunk_copy = chunk.rename(columns=column_mapping)
         cols_without_na = [col for col in chunk_copy.columns if col != "characters"]
-        cast_filter = (chunk_copy["movie_id"].isin(self.title_filter)) & (
+        chunk_copy.dropna(how="any", subset=cols_without_na, inplace=True)
+        chunk_copy["movie_id"] = to_keys(chunk_copy["movie_id"])
+        chunk_copy["actor_id"] = to_keys(chunk_copy["actor_id"])
+        cast_filter = (self.title_filter.isin(chunk_copy["movie_id"])) & (
             chunk_copy["category"].isin(("actor", "actress"))
         )
         chunk_copy = chunk_copy[cast_filter]
-        chunk_copy.dropna(how="any", subset=cols_without_na, inplace=True)
         chunk_copy.drop(columns=["category"], inplace=True)
 
         if not chunk_copy.empty:
-            self.name_filter.update(chunk_copy["actor_id"])
             self.save_to_file(chunk_copy, "cast")
+        return chunk_copy["actor_id"].to_numpy(np.int64)
 
     def transform_name_basics(self, chunk: pd.DataFrame):
         column_mapping = {
@@ -229,9 +907,9 @@ class Parser:
             "birthYear": "birth_year",
             "deathYear": "death_year",
         }
-        self.print_chunk_info(chunk.shape[0])
         chunk_copy = chunk.rename(columns=column_mapping)
-        ratings_filter = chunk_copy["id"].isin(self.name_filter)
+        chunk_copy["id"] = to_keys(chunk_copy["id"])
+        ratings_filter = self.name_filter.isin(chunk_copy["id"])
         chunk_copy = chunk_copy[ratings_filter]
 
         if not chunk_copy.empty:
@@ -244,86 +922,275 @@ class Parser:
             "numVotes": "num_votes",
         }
         chunk_copy = chunk.rename(columns=column_mapping)
-        self.print_chunk_info(chunk.shape[0])
         chunk_copy.dropna(how="any", inplace=True)
-        ratings_filter = chunk_copy["movie_id"].isin(self.title_filter)
+        chunk_copy["movie_id"] = to_keys(chunk_copy["movie_id"])
+        ratings_filter = self.title_filter.isin(chunk_copy["movie_id"])
         chunk_copy = chunk_copy[ratings_filter]
         if not chunk_copy.empty:
             self.save_to_file(chunk_copy, "ratings")
 
     def check_actors(self):
-        existing_actors = set()
-        actors_path = os.path.join(self.transformed_dir, "actors.csv")
-        cast_path = os.path.join(self.transformed_dir, "cast.csv")
-        
-        with open(actors_path, encoding="UTF-8") as actors:
-            actors.readline()
-            existing_actors = {line.split(",")[0] for line in actors}
-
-        with tempfile.NamedTemporaryFile(mode="a", encoding="UTF-8", delete=False) as new_cast:
-            with open(cast_path, encoding="UTF-8") as cast:
-                new_cast.write(cast.readline())
-                new_cast.writelines([line for line in cast if line.split(',')[1] in existing_actors])
-            
-        shutil.move(new_cast.name, cast_path)
-        del new_cast
-            
+        """Removes cast rows of actors missing in transformed actors files"""
+        existing_actors = read_table(self.transformed_dir, "actors", usecols=["id"], dtype=np.int64)["id"]
+        update_table(
+            self.transformed_dir,
+            "cast",
+            lambda cast: cast[cast["actor_id"].astype(np.int64).isin(existing_actors)],
+        )
+
+    def count_actor_degrees(self):
+        """Adds movie_count and co_star_count columns to transformed actors files"""
+        cast = read_table(self.transformed_dir, "cast", usecols=["movie_id", "actor_id"], dtype=np.int64)
+        movie_count, co_star_count = actor_degrees(cast)
+        del cast
+
+        def add_degrees(actors: pd.DataFrame):
+            ids = actors["id"].astype(np.int64)
+            actors["movie_count"] = ids.map(movie_count).fillna(0).astype(int)
+            actors["co_star_count"] = ids.map(co_star_count).fillna(0).astype(int)
+            return actors
+
+        update_table(self.transformed_dir, "actors", add_degrees)
+
+    def build_graph_snapshot(self):
+        """Writes binary co-star graph snapshot used by find_actors.py"""
+        Cast_graph.from_csv(self.transformed_dir).save(snapshot_path)
+        Cast_graph.open(snapshot_path, verify=True)
+
+    def build_movie_attributes(self):
+        """Writes years, ratings and regions of graph movies used by constrained search"""
+        graph = Cast_graph.open(snapshot_path)
+        if self.stream:
+            movies = self.read_query('SELECT "id", "start_year" FROM "stream_movies"')
+            ratings = self.read_query('SELECT "movie_id", "average", "num_votes" FROM "stream_ratings"')
+            akas = self.read_query('SELECT "movie_id", "region" FROM "stream_akas"', keep_default_na=False)
+            attributes = Movie_attributes.from_frames(graph, movies, ratings, akas)
+        else:
+            attributes = Movie_attributes.from_csv(graph, self.transformed_dir)
+        attributes.save(movie_attributes_path)
+
+    def add_actor_components(self):
+        """Adds connected component column to transformed actors files"""
+        graph = Cast_graph.open(snapshot_path)
+
+        def add_component(actors: pd.DataFrame):
+            indices = graph.actor_indices(actors["id"].astype(np.int64))
+            component = pd.Series(np.asarray(graph.component)[indices], dtype="Int64")
+            actors["component"] = component.where(indices >= 0)
+            return actors
+
+        update_table(self.transformed_dir, "actors", add_component)
+
+    def build_landmarks(self, count: int):
+        """Writes distances from count actors with the most movies to every actor
+
+        After incremental run with changed cast landmarks keep their actors and
+        only those reaching changed actors are searched again.
+        """
+        graph = Cast_graph.open(snapshot_path)
+        previous = self.previous_index(landmarks_path, Landmarks)
+        landmarks = None
+        if previous is not None and len(previous.actors) == count:
+            landmarks, searched = previous.update(self.previous_graph, graph, self.changed)
+            if landmarks is not None:
+                print(f"Landmarks: {searched} of {count} searched again", flush=True)
+        if landmarks is None:
+            landmarks = Landmarks.compute(graph, count)
+        landmarks.save(landmarks_path)
+
+    def previous_index(self, file_path: str, cls):
+        """Opens landmarks or center tree computed on previous graph
+
+        Returns:
+            Landmarks | Center_tree | None: index or None when cast wasn't compared
+                with previous graph or index is missing or stale
+        """
+        if self.changed is None or not os.path.exists(file_path):
+            return None
+        try:
+            index = cls.open(file_path)
+        except Snapshot_error:
+            return None
+        size = len(index.distances if cls is Landmarks else index.distance)
+        if index.dataset != self.previous_graph.dataset or size != self.previous_graph.num_actors:
+            return None
+        return index
+
+    def compute_degrees(self, centers: Iterable):
+        """Writes distances and predecessors from every center actor to all actors
+
+        Each center gets its shortest path tree file next to the graph snapshot
+        and its rows in transformed degrees file, which replaces previous one.
+        When streaming, rows are copied to degrees table in one transaction.
+        Centers are checked first and new files are written aside, so previous
+        trees and degrees stay in place unless every center succeeds.
+        """
+        graph = Cast_graph.open(snapshot_path)
+        indices = []
+        for center_id in centers:
+            center = graph.actor_index(to_key(center_id))
+            if center is None:
+                raise Exception(f"Center actor {center_id} is not in cast")
+            indices.append((center_id, center))
+
+        degrees_path = os.path.join(self.transformed_dir, f"degrees.{self.file_format}")
+        old_files = [
+            os.path.join(self.data_dir, file)
+            for file in os.listdir(self.data_dir)
+            if file.startswith("center_") and file.endswith(".bin")
+        ]
+        # trees of previous graph which don't reach changed actors are only remapped
+        previous = {}
+        for file_path in old_files:
+            tree = self.previous_index(file_path, Center_tree)
+            if tree is not None and not tree.reaches(self.changed):
+                previous[self.previous_graph.actor_id(tree.center)] = tree
+        written = []
+
+        def center_frames():
+            for center_id, center in indices:
+                if graph.actor_id(center) in previous:
+                    tree = previous[graph.actor_id(center)].remap(self.previous_graph, graph)
+                    print(f"Center {center_id}: previous paths reused", flush=True)
+                else:
+                    tree = Center_tree.compute(graph, center)
+                file_path = center_path(graph.actor_id(center))
+                tree.save(f"{file_path}.tmp")
+                written.append(file_path)
+                yield tree.to_frame(graph)
+
+        try:
+            if self.stream:
+                conn = create_engine(self.database_url).raw_connection()
+                cursor = conn.cursor()
+                try:
+                    for frame in center_frames():
+                        self.copy_frame(cursor, frame, "degrees")
+                    conn.commit()
+                finally:
+                    cursor.close()
+                    conn.close()
+            else:
+                writer = Shard_writer(f"{degrees_path}.tmp", "degrees", self.file_format)
+                try:
+                    for frame in center_frames():
+                        writer.write(frame)
+                finally:
+                    writer.close()
+        except Exception:
+            for file_path in written + [degrees_path]:
+                if os.path.exists(f"{file_path}.tmp"):
+                    os.remove(f"{file_path}.tmp")
+            raise
+
+        if not self.stream:
+            remove_table(self.transformed_dir, "degrees")
+            if os.path.exists(f"{degrees_path}.tmp"):
+                os.replace(f"{degrees_path}.tmp", degrees_path)
+        for file_path in old_files:
+            if file_path not in written:
+                os.remove(file_path)
+        for file_path in written:
+            os.replace(f"{file_path}.tmp", file_path)
+
+    def refresh_degrees(self, centers: Iterable, load_db=False):
+        """Recomputes degrees from center actors on existing graph snapshot, without transforming
+
+        Degrees table is replaced in one transaction when load_db, and kept as
+        loaded state of previous incremental run if there is one.
+        """
+        if not os.path.exists(snapshot_path):
+            raise Exception("No graph snapshot, first transform data")
+        if load_db:
+            self.check_database()
+        self.compute_degrees(centers)
+        print("Degrees computed from center actors", flush=True)
+        if load_db:
+            self.load_to_db(table_files(self.transformed_dir, "degrees"), "degrees", replace=True)
+            print("Data degrees loaded", flush=True)
+            if os.path.exists(self.previous_dir):
+                merge_table(
+                    self.transformed_dir, "degrees", os.path.join(self.previous_dir, "degrees.csv")
+                )
+
     def run(
-        self, load_db=False, delete_raw=False, delete_transformed=False, transform=True
+        self,
+        load_db=False,
+        delete_raw=False,
+        delete_transformed=False,
+        transform=True,
+        landmarks=16,
+        centers: Iterable = ("nm0000102",),
+        incremental=False,
+        merge=False,
+        stream=False,
     ):
+        if stream and incremental:
+            raise Exception("Streaming load can't be combined with incremental refresh")
+        if load_db:
+            self.check_database()
+        if not transform:
+            for directory in (self.transformed_dir, self.previous_dir):
+                self.convert_ids(directory)
         errors = []
         name_flag = False
         title_flag = False
+        keep_loaded = incremental
+        incremental = incremental and os.path.exists(os.path.join(self.previous_dir, "movies.csv"))
+        reuse_graph = False
+        # streamed data never touches transformed files, so they would only be stale
+        self.stream = stream and transform and load_db
+        if transform and (incremental or self.stream):
+            shutil.rmtree(self.transformed_dir)
+            os.mkdir(self.transformed_dir)
+        if self.stream:
+            self.create_stream_tables()
         if transform:
             with self.CustomManager() as manager:
-                self.title_filter = manager.set()
-                self.name_filter = manager.set()
+                self.title_filter = Shared_filter()
+                self.name_filter = Shared_filter()
 
                 # MOVIES
-                self.current_chunk = manager.Counter(0)
+                self.bytes_read = manager.Counter(0)
                 func = self.transform_title_basics
                 file = "title_basics.tsv"
                 try:
-                    self.multi_process_transform(
+                    ids = self.multi_process_transform(
                         func=func,
                         file=file,
                         cols=["tconst", "titleType", "originalTitle", "startYear"],
                         chunksize=5000,
                     )
-                    self.title_filter = self.title_filter._getvalue()
-                    if self.title_filter:
-                        with open(
-                            os.path.join(self.data_dir, "title_filter.csv"),
-                            "w",
-                            encoding="utf-8",
-                        ) as f:
-                            f.write(",".join(self.title_filter))
+                    self.title_filter.release()
+                    self.title_filter = Shared_filter(ids)
+                    if len(self.title_filter):
+                        self.save_filter("title", self.title_filter)
                     title_flag = True
                 except Exception as e:
                     errors.append((func.__name__, file, e))
                     print(f"\n{file}: Failed to parse from file")
 
                 if not title_flag:
-                    self.title_filter = set()
-                    filter_path = os.path.join(self.data_dir, "title_filter.csv")
-                    if os.path.exists(filter_path):
-                        with open(filter_path, encoding="UTF-8") as f:
-                            self.title_filter.update(f.readline().split(","))
+                    ids = self.load_filter("title")
+                    if ids is not None:
+                        self.title_filter.release()
+                        self.title_filter = Shared_filter(ids)
                         print("Downloading ids of movies")
                         print(f"Downloaded {len(self.title_filter)} ids")
-                    if not self.title_filter:
+                    if not len(self.title_filter):
                         errors_str = "\n\n".join(
                             [
                                 f"Function: {func} operating on file {file} raised error:\n{error}"
                                 for func, file, error in errors
                             ]
                         )
+                        self.release_filters()
                         raise Exception(
                             f"\nFirst must be loaded the title_basics file\n{errors_str}"
                         )
 
                 # AKAS
-                self.current_chunk = manager.Counter(0)
+                self.bytes_read = manager.Counter(0)
                 func = self.transform_title_akas
                 file = "title_akas.tsv"
                 try:
@@ -338,31 +1205,27 @@ class Parser:
                     print(f"\n{file}: Failed to parse from file")
 
                 # CAST
-                self.current_chunk = manager.Counter(0)
+                self.bytes_read = manager.Counter(0)
                 func = self.transform_title_principals
                 file = "title_principals.tsv"
                 try:
-                    self.multi_process_transform(
+                    ids = self.multi_process_transform(
                         func=func,
                         file=file,
                         cols=["tconst", "nconst", "category", "characters"],
                         chunksize=5000,
                     )
-                    self.name_filter = self.name_filter._getvalue()
-                    if self.name_filter:
-                        with open(
-                            os.path.join(self.data_dir, "name_filter.csv"),
-                            "w",
-                            encoding="utf-8",
-                        ) as f:
-                            f.write(",".join(self.name_filter))
+                    self.name_filter.release()
+                    self.name_filter = Shared_filter(ids)
+                    if len(self.name_filter):
+                        self.save_filter("name", self.name_filter)
                     name_flag = True
                 except Exception as e:
                     errors.append((func.__name__, file, e))
                     print(f"\n{file}: Failed to parse from file")
 
                 # RATINGS
-                self.current_chunk = manager.Counter(0)
+                self.bytes_read = manager.Counter(0)
                 func = self.transform_ratings
                 file = "title_ratings.tsv"
                 try:
@@ -372,26 +1235,26 @@ class Parser:
                     print(f"\n{file}: Failed to parse from file")
 
                 if not name_flag:
-                    self.name_filter = set()
-                    filter_path = os.path.join(self.data_dir, "name_filter.csv")
-                    if os.path.exists(filter_path):
-                        with open(filter_path, encoding="UTF-8") as f:
-                            self.name_filter.update(f.readline().split(","))
+                    ids = self.load_filter("name")
+                    if ids is not None:
+                        self.name_filter.release()
+                        self.name_filter = Shared_filter(ids)
                         print("Downloading ids of actors")
                         print(f"Downloaded {len(self.name_filter)} ids")
-                    if not self.name_filter:
+                    if not len(self.name_filter):
                         errors_str = "\n\n".join(
                             [
                                 f"Function: {func} operating on file {file} raised error:\n{error}"
                                 for func, file, error in errors
                             ]
                         )
+                        self.release_filters()
                         raise Exception(
                             f"\nFirst must be loaded the title_principals file\n{errors_str}"
                         )
 
                 # ACTORS
-                self.current_chunk = manager.Counter(0)
+                self.bytes_read = manager.Counter(0)
                 func = self.transform_name_basics
                 file = "name_basics.tsv"
                 try:
@@ -404,14 +1267,93 @@ class Parser:
                 except Exception as e:
                     errors.append((func.__name__, file, e))
                     print(f"\n{file}: Failed to parse from file")
+                self.release_filters()
 
-                func = self.check_actors
+                func = self.merge_shards
+                file = "manifest.json"
+                if merge:
+                    try:
+                        func()
+                    except Exception as e:
+                        errors.append((func.__name__, file, e))
+                        print(f"\n{file}: Error in merging shards of transformed files")
+
+                func = self.check_stream_actors if self.stream else self.check_actors
                 file = "cast.csv"
                 try:
                     func()
                 except Exception as e:
                     errors.append((func.__name__, file, e))
                     print(f"\n{file}: Erorr in checking transformed cast file")
+
+                func = self.count_actor_degrees
+                file = "actors.csv"
+                if not self.stream:
+                    try:
+                        func()
+                    except Exception as e:
+                        errors.append((func.__name__, file, e))
+                        print(f"\n{file}: Error in counting actor degrees")
+
+                if incremental:
+                    file = "cast.csv"
+                    try:
+                        self.changed = self.changed_actors()
+                        reuse_graph = (
+                            self.changed is not None
+                            and not len(self.changed)
+                            and all(os.path.exists(center_path(to_key(center_id))) for center_id in centers)
+                        )
+                    except Exception as e:
+                        errors.append(("changed_actors", file, e))
+                        print(f"\n{file}: Error in comparing cast with previous run")
+
+                func = self.reuse_graph if reuse_graph else self.build_graph_snapshot
+                if self.stream:
+                    func = self.build_stream_graph
+                file = "cast.csv"
+                try:
+                    func()
+                except Exception as e:
+                    errors.append((func.__name__, file, e))
+                    print(f"\n{file}: Error in building graph snapshot")
+
+                func = self.build_movie_attributes
+                file = "movies.csv"
+                try:
+                    func()
+                except Exception as e:
+                    errors.append((func.__name__, file, e))
+                    print(f"\n{file}: Error in building movie attributes")
+
+                func = self.publish_stream if self.stream else self.add_actor_components
+                file = "actors.csv"
+                try:
+                    func()
+                except Exception as e:
+                    errors.append((func.__name__, file, e))
+                    if self.stream:
+                        print(f"\n{file}: Error in publishing streamed data")
+                    else:
+                        print(f"\n{file}: Error in adding actor components")
+
+                func = self.build_landmarks
+                file = "graph.bin"
+                if landmarks and not reuse_graph:
+                    try:
+                        func(landmarks)
+                    except Exception as e:
+                        errors.append((func.__name__, file, e))
+                        print(f"\n{file}: Error in building landmarks")
+
+                func = self.compute_degrees
+                file = "graph.bin"
+                if centers and not reuse_graph:
+                    try:
+                        func(centers)
+                    except Exception as e:
+                        errors.append((func.__name__, file, e))
+                        print(f"\n{file}: Error in computing degrees from center actors")
                 
                 if errors:
                     errors_str = "\n\n".join(
@@ -422,11 +1364,20 @@ class Parser:
                     )
                     print(errors_str)
 
-        if load_db:
+        if load_db and not self.stream:
             if not os.listdir(self.transformed_dir):
                 print("No data to transform")
+            elif incremental:
+                try:
+                    self.load_changes()
+                except Exception as e:
+                    print(e, flush=True)
+                else:
+                    self.keep_loaded()
             else:
                 self.load_all()
+                if keep_loaded:
+                    self.keep_loaded()
 
         if delete_raw:
             try:
@@ -439,8 +1390,11 @@ class Parser:
         if delete_transformed:
             try:
                 shutil.rmtree(self.transformed_dir)
-                os.remove(os.path.join(self.data_dir, 'title_filter.csv'))
-                os.remove(os.path.join(self.data_dir, 'name_filter.csv'))
+                for name in ("title", "name"):
+                    for file_format in FORMATS:
+                        filter_path = os.path.join(self.data_dir, f"{name}_filter.{file_format}")
+                        if os.path.exists(filter_path):
+                            os.remove(filter_path)
             except Exception as e:
                 print(f"Could't remove transformed data. Error: {e}")
             else:
@@ -478,15 +1432,99 @@ def load_args():
         help="Disable data transformation",
     )
 
+    parser.add_argument(
+        "-l",
+        "--landmarks",
+        type=int,
+        default=16,
+        help="Number of landmark actors used for distance bounds, 0 disables them.",
+    )
+
+    parser.add_argument(
+        "-c",
+        "--centers",
+        nargs="*",
+        default=["nm0000102"],
+        help="Ids of center actors with precomputed paths to every actor. Defaults to Kevin Bacon.",
+    )
+
+    parser.add_argument(
+        "-D",
+        "--degrees_only",
+        action="store_true",
+        help="Only recompute degrees from center actors on existing graph snapshot "
+        "and replace them in the database, without transforming.",
+    )
+
+    parser.add_argument(
+        "-i",
+        "--incremental",
+        action="store_true",
+        help="Enable applying only changes since previous incremental run to the database "
+        "and reusing graph when cast didn't change. First run loads everything.",
+    )
+
+    parser.add_argument(
+        "-S",
+        "--stream",
+        action="store_true",
+        help="Enable streaming transformed rows straight to the database instead of transformed files.",
+    )
+
+    parser.add_argument(
+        "-F",
+        "--format",
+        choices=FORMATS,
+        default="csv",
+        help="Format of transformed files, parquet stores typed and compressed columns (requires pyarrow).",
+    )
+
+    parser.add_argument(
+        "-m",
+        "--merge",
+        action="store_true",
+        help="Enable merging shards written by processes into single file of every table.",
+    )
+
+    parser.add_argument(
+        "-p",
+        "--processes",
+        type=int,
+        default=mp.cpu_count(),
+        help="Number of transforming processes.",
+    )
+
+    parser.add_argument(
+        "--chunksize",
+        type=int,
+        default=None,
+        help="Rows parsed at once by every process, bounds memory together with number of processes.",
+    )
+
+    parser.add_argument(
+        "--block_size",
+        type=int,
+        default=64,
+        help="Maximal size in MiB of part of file given to process at once.",
+    )
+
     return parser.parse_args()
 
 
 if __name__ == "__main__":
     args = load_args()
-    p = Parser(DATABASE_URL)
-    p.run(
-        load_db=args.not_load,
-        delete_raw=args.delete_raw,
-        delete_transformed=args.delete_transformed,
-        transform=args.not_transform,
-    )
+    p = Parser(DATABASE_URL, args.processes, args.chunksize, args.block_size * 2**20, args.format)
+    if args.degrees_only:
+        p.refresh_degrees(args.centers, load_db=args.not_load)
+    else:
+        p.run(
+            load_db=args.not_load,
+            delete_raw=args.delete_raw,
+            delete_transformed=args.delete_transformed,
+            transform=args.not_transform,
+            landmarks=args.landmarks,
+            centers=args.centers,
+            incremental=args.incremental,
+            merge=args.merge,
+            stream=args.stream,
+        )
@@ -0,0 +1,274 @@
+import os
+import json
+import numpy as np
+import pandas as pd
+from typing import Callable, Iterable
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:
+    pa = None
+    pq = None
+
+MANIFEST = "manifest.json"
+FORMATS = ("csv", "parquet")
+
+# Types of columns in parquet files, so every shard of table has the same schema
+# even when some of its chunks have only missing values in a column
+TABLE_TYPES = {
+    "id": "int64",
+    "movie_id": "int64",
+    "actor_id": "int64",
+    "center_id": "int64",
+    "original_title": "string",
+    "start_year": "int64",
+    "title": "string",
+    "region": "string",
+    "characters": "string",
+    "average": "float64",
+    "num_votes": "int64",
+    "name": "string",
+    "birth_year": "float64",
+    "death_year": "float64",
+    "movie_count": "int64",
+    "co_star_count": "int64",
+    "component": "Int64",
+    "distance": "int64",
+    "parent_id": "Int64",
+}
+# degrees rows of center itself have no parent and movie
+NULLABLE_TYPES = {"degrees": {"movie_id": "Int64"}}
+
+
+def check_format(file_format: str):
+    """Raises exception if file format is unknown or its library is missing"""
+    if file_format not in FORMATS:
+        raise ValueError(f"Unknown file format {file_format}, use one of {FORMATS}")
+    if file_format == "parquet" and pq is None:
+        raise Exception("Parquet format requires pyarrow, install it with: pip install pyarrow")
+
+
+def format_of(file_path: str):
+    return "parquet" if file_path.endswith(".parquet") else "csv"
+
+
+def shard_name(table: str, index: int, file_format: str = "csv"):
+    """Name of shard file of table, e.g. cast.part-00007.csv"""
+    return f"{table}.part-{index:05d}.{file_format}"
+
+
+def typed(frame: pd.DataFrame, table: str | None = None):
+    """Casts columns of frame to types of parquet schema"""
+    types = {**TABLE_TYPES, **NULLABLE_TYPES.get(table, {})}
+    return frame.astype({column: types[column] for column in frame.columns if column in types})
+
+
+def read_shard(
+    file_path: str,
+    usecols: Iterable | None = None,
+    dtype=None,
+    keep_default_na: bool = True,
+):
+    """Reads csv or parquet file of table
+
+    Parquet files are memory-mapped and only usecols are read. With dtype=str
+    values are formatted like in csv file, missing ones as "" when
+    keep_default_na is False.
+    """
+    if format_of(file_path) == "csv":
+        return pd.read_csv(file_path, usecols=usecols, dtype=dtype, keep_default_na=keep_default_na)
+
+    frame = pd.read_parquet(
+        file_path, columns=list(usecols) if usecols is not None else None, memory_map=True
+    )
+    if dtype is str:
+        missing = frame.isna()
+        frame = frame.astype(object).astype(str)
+        frame = frame.mask(missing, np.nan if keep_default_na else "")
+    elif dtype is not None:
+        frame = frame.astype(dtype)
+    return frame
+
+
+class Shard_writer:
+    def __init__(
+        self, file_path: str, table: str | None = None, file_format: str | None = None
+    ) -> None:
+        """Init of Shard_writer class
+
+        Writes frames one after another to csv file or to row groups of
+        parquet file.
+
+        Args:
+            file_path (str): path of file
+            table (str | None): name of table, used for types of its columns
+            file_format (str | None): csv or parquet. Defaults to extension of file.
+        """
+        self.file_path = file_path
+        self.table = table
+        self.format = file_format or format_of(file_path)
+        self.handle = None
+        self.rows = 0
+
+    def write(self, frame: pd.DataFrame):
+        if self.format == "csv":
+            if self.handle is None:
+                self.handle = open(self.file_path, "w", encoding="UTF-8")
+            frame.to_csv(self.handle, header=self.rows == 0, index=False, lineterminator="\n")
+        else:
+            data = pa.Table.from_pandas(typed(frame, self.table), preserve_index=False)
+            if self.handle is None:
+                self.handle = pq.ParquetWriter(self.file_path, data.schema, compression="zstd")
+            self.handle.write_table(data.cast(self.handle.schema))
+        self.rows += len(frame)
+
+    def close(self):
+        if self.handle is not None:
+            self.handle.close()
+
+
+def write_shard(
+    frame: pd.DataFrame, file_path: str, table: str | None = None, file_format: str | None = None
+):
+    writer = Shard_writer(file_path, table, file_format)
+    writer.write(frame)
+    writer.close()
+
+
+def read_manifest(directory: str):
+    """Returns dict table -> list of shards ({"file", "rows"}) in order of source file"""
+    file_path = os.path.join(directory, MANIFEST)
+    if not os.path.exists(file_path):
+        return {}
+    with open(file_path, encoding="UTF-8") as f:
+        return json.load(f)
+
+
+def write_manifest(directory: str, table: str, shards: list | None):
+    """Replaces shards of table in manifest and removes files of its old shards
+
+    Args:
+        directory (str): directory of table
+        table (str): name of table
+        shards (list | None): shards ({"file", "rows"}) in order, None drops table from manifest
+    """
+    manifest = read_manifest(directory)
+    old = {shard["file"] for shard in manifest.get(table, [])}
+    if shards is None:
+        manifest.pop(table, None)
+    else:
+        manifest[table] = shards
+        old -= {shard["file"] for shard in shards}
+    for file in old:
+        file_path = os.path.join(directory, file)
+        if os.path.exists(file_path):
+            os.remove(file_path)
+
+    file_path = os.path.join(directory, MANIFEST)
+    with open(f"{file_path}.tmp", "w", encoding="UTF-8") as f:
+        json.dump(manifest, f, indent=2)
+    os.replace(f"{file_path}.tmp", file_path)
+
+
+def table_files(directory: str, table: str):
+    """Paths of files of table, shards from manifest or single {table}.csv or {table}.parquet file"""
+    manifest = read_manifest(directory)
+    if table in manifest:
+        return [os.path.join(directory, shard["file"]) for shard in manifest[table]]
+    for file_format in FORMATS:
+        file_path = os.path.join(directory, f"{table}.{file_format}")
+        if os.path.exists(file_path):
+            return [file_path]
+    return []
+
+
+def table_exists(directory: str, table: str):
+    return bool(table_files(directory, table))
+
+
+def remove_table(directory: str, table: str):
+    """Removes all files of table"""
+    write_manifest(directory, table, None)
+    for file_format in FORMATS:
+        file_path = os.path.join(directory, f"{table}.{file_format}")
+        if os.path.exists(file_path):
+            os.remove(file_path)
+
+
+def table_version(directory: str, table: str):
+    """Fingerprint of files of table used to detect stale snapshots"""
+    stats = [os.stat(file_path) for file_path in table_files(directory, table)]
+    if not stats:
+        raise FileNotFoundError(f"No files of table {table} in {directory}")
+    size = sum(stat.st_size for stat in stats)
+    mtime = max(stat.st_mtime_ns for stat in stats)
+    if len(stats) == 1:
+        return f"{size}-{mtime}"
+    return f"{size}-{mtime}-{len(stats)}"
+
+
+def read_table(directory: str, table: str, **kwargs):
+    """Reads all files of table into one data frame, kwargs are passed to read_shard"""
+    files = table_files(directory, table)
+    if not files:
+        raise FileNotFoundError(f"No files of table {table} in {directory}")
+    return pd.concat([read_shard(file_path, **kwargs) for file_path in files], ignore_index=True)
+
+
+def update_table(directory: str, table: str, func: Callable):
+    """Replaces every file of table with result of func called with its frame
+
+    Csv files are read as text (dtype=str, keep_default_na=False), so columns
+    not touched by func are written back unchanged; parquet files keep types.
+    Row counts in manifest follow rows returned by func.
+    """
+    manifest = read_manifest(directory)
+    rows = {}
+    for file_path in table_files(directory, table):
+        if format_of(file_path) == "csv":
+            frame = func(read_shard(file_path, dtype=str, keep_default_na=False))
+        else:
+            frame = func(read_shard(file_path))
+        write_shard(frame, f"{file_path}.tmp", table, format_of(file_path))
+        os.replace(f"{file_path}.tmp", file_path)
+        rows[os.path.basename(file_path)] = len(frame)
+    if table in manifest:
+        shards = [{**shard, "rows": rows.get(shard["file"], shard["rows"])} for shard in manifest[table]]
+        write_manifest(directory, table, shards)
+
+
+def merge_table(directory: str, table: str, file_path: str | None = None):
+    """Concatenates shards of table in order into single file with one header
+
+    Args:
+        directory (str): directory of table
+        table (str): name of table
+        file_path (str | None): destination, its extension chooses format, e.g. csv
+            export of parquet shards for COPY; shards are replaced by single file
+            of their format in directory when None
+    """
+    files = table_files(directory, table)
+    if not files:
+        return
+    destination = file_path or os.path.join(directory, f"{table}.{format_of(files[0])}")
+    if files == [destination]:
+        return
+    if format_of(destination) == "csv" and all(format_of(shard) == "csv" for shard in files):
+        # csv shards are copied as text, skipping repeated headers
+        with open(f"{destination}.tmp", "w", encoding="UTF-8") as merged:
+            for i, shard_path in enumerate(files):
+                with open(shard_path, encoding="UTF-8") as shard:
+                    header = shard.readline()
+                    if i == 0:
+                        merged.write(header)
+                    for block in iter(lambda: shard.read(2**20), ""):
+                        merged.write(block)
+    else:
+        writer = Shard_writer(f"{destination}.tmp", table, format_of(destination))
+        for shard_path in files:
+            writer.write(read_shard(shard_path))
+        writer.close()
+    os.replace(f"{destination}.tmp", destination)
+    if file_path is None:
+        write_manifest(directory, table, None)
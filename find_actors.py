@@ -1,23 +1,32 @@
 from database.database import get_session
-from database.models import Cast
+from database.graph import Graph_BFS, gather, get_center_trees, get_graph, get_landmarks
+from database.constraints import Constraints, get_masks, get_movie_attributes
+from database.ids import to_key
+from database.models import Actors, Cast, Degrees
 from queue import Queue, PriorityQueue
-from sqlalchemy import select, func
+from sqlalchemy import select, func, any_, bindparam, Integer
+from sqlalchemy.dialects.postgresql import ARRAY
+from sqlalchemy.orm import aliased
 from typing_extensions import Self
 import time
-from functools import lru_cache
+import heapq
+import threading
+import numpy as np
+from typing import Iterable
+from path_cache import Path_cache, default_cache, reverse_solution
 
 class Node:
     def __init__(
         self,
-        state: str,
+        state: int,
         parent: Self | None = None,
-        common_movie: str | None = None,
+        common_movie: int | None = None,
         layer: int = 0,
     ) -> None:
         """Init of Node class
 
         Args:
-            state (str): current actor id
+            state (int): current actor id or graph index
             parent (Node; | None): A parent Node
             common_movie (str | None): Movie where current and parent stared in
             layer (int): Degree of Kevin Bacon's Law
@@ -30,67 +39,445 @@ class Node:
     def __lt__(self, other):
         return self.layer < other.layer
 
+class Not_connected(Exception):
+    def __init__(self, start_id: int, goal_id: int) -> None:
+        super().__init__(f"No solution: actors {start_id} and {goal_id} are not connected")
+        self.start_id = start_id
+        self.goal_id = goal_id
+
+
+class Budget_exceeded(Exception):
+    REASONS = ("layers", "nodes", "time", "cancelled")
+
+    def __init__(self, start_id: int, goal_id: int, reason: str, stats: dict) -> None:
+        """Raised when search is stopped by its budget before finding solution
+
+        Args:
+            start_id (int): Id of start actor
+            goal_id (int): Id of goal actor
+            reason (str): "layers", "nodes", "time" or "cancelled"
+            stats (dict): partial statistics of search: expanded_nodes, layer, elapsed, layer_stats
+        """
+        super().__init__(
+            f"Search from {start_id} to {goal_id} stopped ({reason}) after "
+            f"{stats['expanded_nodes']} expanded actors and {stats['elapsed']:.3f}s"
+        )
+        self.start_id = start_id
+        self.goal_id = goal_id
+        self.reason = reason
+        self.stats = stats
+
+
+class Cancel_token:
+    def __init__(self) -> None:
+        """Flag shared with running search, set from other thread to stop it"""
+        self.event = threading.Event()
+
+    def cancel(self):
+        self.event.set()
+
+    @property
+    def cancelled(self):
+        return self.event.is_set()
+
+
+def skip_expanded(rows, expanded: set):
+    """Filters neighbor rows so cast of every movie is enumerated once per search
+
+    Args:
+        rows (Iterable): rows starting with (source actor, movie, ...)
+        expanded (set): movies already enumerated, updated in place
+
+    Yields:
+        row: rows of movies not enumerated before, each movie only from its first source actor
+    """
+    first_source = {}
+    for row in rows:
+        source, movie = row[0], row[1]
+        if movie not in first_source:
+            if movie in expanded:
+                continue
+            expanded.add(movie)
+            first_source[movie] = source
+        if first_source[movie] == source:
+            yield row
+
+
 class Find_Actor_BFS:
-    def __init__(self, start_id: str, goal_id: str) -> None:
+    MODES = ("vectorized", "astar", "graph", "weighted", "sql", "sql_batch")
+    GRAPH_MODES = ("vectorized", "astar", "graph", "weighted")
+
+    def __init__(
+        self,
+        start_id: int,
+        goal_id: int,
+        mode: str = "vectorized",
+        bidirectional: bool = False,
+        direction: str = "auto",
+        max_layer: int = 6,
+        max_nodes: int | None = None,
+        timeout: float | None = None,
+        cancel_token: Cancel_token | None = None,
+        constraints: Constraints | None = None,
+    ) -> None:
         """Init of Find_Actor_BFS class
 
         Args:
-            start_id (str): Id of start actor
-            goal_id (str): Id of goal actor
+            start_id (int): Id of start actor
+            goal_id (int): Id of goal actor
+            mode (str): "vectorized" expands whole layers at once over in-memory co-star graph,
+                "astar" expands actors in order of landmark lower bound of path length,
+                "graph" expands neighbors from in-memory co-star graph actor by actor,
+                "weighted" finds among shortest paths one through the most voted movies,
+                "sql" queries cast table for every expanded actor,
+                "sql_batch" queries cast table once per layer. Defaults to "vectorized".
+            bidirectional (bool): Search from both actors until frontiers meet. Defaults to False.
+            direction (str): Direction of vectorized search, see Graph_BFS. Defaults to "auto".
+            max_layer (int): Maximum length of path. Defaults to 6.
+            max_nodes (int | None): Maximum number of expanded actors, None is unlimited. Defaults to None.
+            timeout (float | None): Seconds after which search is stopped, None is unlimited. Defaults to None.
+            cancel_token (Cancel_token | None): Token which stops search when cancelled. Defaults to None.
+            constraints (Constraints | None): Allowed movies and actors of path, compiled to masks
+                over graph, so only graph modes support them. Defaults to None.
         """
-        self.session = get_session()
+        if mode not in self.MODES:
+            raise ValueError(f"Unknown mode {mode}, expected one of {self.MODES}")
+        if constraints and mode not in self.GRAPH_MODES:
+            raise ValueError(f"Constraints are not supported in {mode} mode")
+        self.mode = mode
+        self.bidirectional = bidirectional
+        self.direction = direction
+        self.graph = get_graph() if mode in self.GRAPH_MODES else None
+        self.landmarks = get_landmarks() if self.graph is not None else None
+        self.session = get_session() if self.graph is None else None
+        self.dataset = self.graph.dataset if self.graph is not None else None
         self.start_id = start_id
         self.goal_id = goal_id
-        self.max_layer = 6
+        self.max_layer = max_layer
+        self.max_nodes = max_nodes
+        self.timeout = timeout
+        self.cancel_token = cancel_token
+        self.constraints = constraints if constraints else None
+        self.movie_mask, self.actor_mask = get_masks(constraints) if self.constraints else (None, None)
+        self.expanded_nodes = 0
+        self.started = None
         self.solution = None
         self.current_layer = -1
+        self.movie_counts = {}
+        self.layer_stats = []
+        self.search = None
+
+    @property
+    def cache_version(self):
+        """Version of cached solutions, constrained paths are cached apart from unconstrained"""
+        if self.dataset is None:
+            return None
+        version = self.dataset
+        if self.mode == "weighted":
+            version += ":weighted"
+        if self.constraints is not None:
+            version += f":{self.constraints}"
+        return version
+
+    def to_state(self, actor_id: int):
+        """Converts actor id to state used by search (graph index in graph mode)"""
+        if self.graph is not None:
+            return self.graph.actor_index(actor_id)
+        return actor_id
 
-    def get_neighbors(self, actor_id: str):
+    def to_solution(self, movie, actor):
+        """Converts search state back to pair of (movie id, actor id)"""
+        if self.graph is not None:
+            return self.graph.movie_id(movie), self.graph.actor_id(actor)
+        return movie, actor
+
+    def get_neighbors(self, actor_id: int, expanded: set | None = None):
         """Getting all actors who worked with current actor
 
+        In sql modes movie counts of neighbors are read from actors table
+        in the same query and kept for get_movie_count.
+
         Args:
-            actor_id (str): current actor id
+            actor_id (int): current actor id
+            expanded (set | None): movies whose cast was already enumerated in this search,
+                they are skipped and new movies are added
 
         Returns:
             Iterable: Returns pairs of common movie and neighbor actor
         """
+        if self.graph is not None:
+            return self.graph.neighbors(actor_id, expanded, self.movie_mask, self.actor_mask)
+
         subquery = select(Cast.movie_id).where(Cast.actor_id == actor_id).alias()
 
-        query = select(Cast.movie_id, Cast.actor_id).where(
-            Cast.movie_id.in_(select(subquery.c.movie_id)) & (Cast.actor_id != actor_id)
+        query = (
+            select(Cast.movie_id, Cast.actor_id, func.coalesce(Actors.movie_count, 0))
+            .join(Actors, Actors.id == Cast.actor_id)
+            .where(
+                Cast.movie_id.in_(select(subquery.c.movie_id)) & (Cast.actor_id != actor_id)
+            )
         )
 
-        return self.session.execute(query).all()
+        rows = ((actor_id, *row) for row in self.session.execute(query))
+        if expanded is not None:
+            rows = skip_expanded(rows, expanded)
+
+        neighbors = []
+        for _, movie, actor, movie_count in rows:
+            self.movie_counts[actor] = movie_count
+            neighbors.append((movie, actor))
+        return neighbors
     
-    def get_movie_count(self, actor_id:str):
+    def get_movie_count(self, actor_id: int):
         """Get numbers of movies where actor stared
 
         Args:
-            actor_id (str): actor id
+            actor_id (int): actor id
 
         Returns:
             int: Number of movies where actor stared
         """
-        query = select(func.count()).select_from(Cast).where(Cast.actor_id == actor_id).order_by(None)
+        if self.graph is not None:
+            return self.graph.movie_count(actor_id)
+        if actor_id in self.movie_counts:
+            return self.movie_counts[actor_id]
+
+        query = select(func.coalesce(Actors.movie_count, 0)).where(Actors.id == actor_id)
         return self.session.scalar(query)
+
+    def get_layer_neighbors(self, actor_ids: list, expanded: set | None = None):
+        """Getting neighbors of whole layer in one query
+
+        Args:
+            actor_ids (list): ids of actors in current layer
+            expanded (set | None): movies whose cast was already enumerated in this search,
+                they are skipped and new movies are added
+
+        Returns:
+            Iterable: Rows of (source actor, common movie, neighbor actor, neighbor movie count)
+        """
+        source = aliased(Cast)
+        costar = aliased(Cast)
+        ids = bindparam("ids", value=list(actor_ids), type_=ARRAY(Integer))
+
+        neighbors = (
+            select(
+                source.actor_id.label("source_id"),
+                costar.movie_id,
+                costar.actor_id,
+            )
+            .join(
+                costar,
+                (costar.movie_id == source.movie_id) & (costar.actor_id != source.actor_id),
+            )
+            .where(source.actor_id == any_(ids))
+            .cte("neighbors")
+        )
+        query = select(
+            neighbors.c.source_id,
+            neighbors.c.movie_id,
+            neighbors.c.actor_id,
+            func.coalesce(Actors.movie_count, 0),
+        ).join(Actors, Actors.id == neighbors.c.actor_id)
+
+        rows = self.session.execute(query).all()
+        if expanded is not None:
+            rank = {actor: i for i, actor in enumerate(actor_ids)}
+            rows.sort(key=lambda row: rank[row[0]])
+            rows = list(skip_expanded(rows, expanded))
+        return rows
     
-    @lru_cache
+    def connected(self, start_state, goal_state):
+        """Checks if actors are in the same connected component
+
+        Returns:
+            bool: False if actors are not connected, True if they are or components are unknown
+        """
+        if self.graph is not None:
+            if start_state is None or goal_state is None:
+                return False
+            return self.graph.connected(start_state, goal_state)
+
+        query = select(Actors.component).where(Actors.id.in_((start_state, goal_state)))
+        components = self.session.scalars(query).all()
+        if len(components) != 2 or None in components:
+            return True
+        return components[0] == components[1]
+
     def find_actor(self):
         """Function with implemented algorithm to search for shortest path between 2 actors
 
         Raises:
-            Exception: When two actors can't find the way in 6 steps
+            Not_connected: When actors are in different connected components
+            Budget_exceeded: When search runs out of layers, nodes or time or is cancelled
             Exception: When all actors where searched
 
         Returns:
             List: List of pairs (movie, actors) where movie is common movie and actor is person that worked with previous; 
             In first tuple movie is empty string
         """
-        start = Node(self.start_id)
-        marked = set(self.start_id)
+        if self.solution is not None:
+            return self.solution
+
+        start_state = self.to_state(self.start_id)
+        goal_state = self.to_state(self.goal_id)
+        if self.start_id != self.goal_id and not self.connected(start_state, goal_state):
+            raise Not_connected(self.start_id, self.goal_id)
+        if self.actor_mask is not None:
+            for actor_id, state in ((self.start_id, start_state), (self.goal_id, goal_state)):
+                if state is None:
+                    raise ValueError(f"Actor {actor_id} is not in cast")
+                if not self.actor_mask[state]:
+                    raise ValueError(f"Actor {actor_id} is excluded by constraints")
+
+        start_time = time.time_ns()
+        self.started = time.monotonic()
+        self.expanded_nodes = 0
+        if self.start_id != self.goal_id and self.constraints is None and self.mode != "weighted":
+            self.solution = self.find_actor_center(start_state, goal_state)
+            if self.solution is not None:
+                self.runtime = (time.time_ns() - start_time) / 1e9
+                return self.solution
+
+        if self.start_id != self.goal_id and self.landmarks is not None:
+            lower, _ = self.landmarks.bounds(start_state, goal_state)
+            if lower is None:
+                raise Not_connected(self.start_id, self.goal_id)
+            if lower > self.max_layer:
+                raise self.budget_exceeded("layers")
+
+        if self.start_id == self.goal_id:
+            self.solution = [("", self.start_id)]
+        elif self.mode == "weighted":
+            self.solution = self.find_actor_weighted(start_state, goal_state)
+        elif self.bidirectional:
+            self.solution = self.find_actor_bidirectional(start_state, goal_state)
+        elif self.mode == "vectorized":
+            self.solution = self.find_actor_vectorized(start_state, goal_state)
+        elif self.mode == "astar":
+            self.solution = self.find_actor_astar(start_state, goal_state)
+        elif self.mode == "sql_batch":
+            self.solution = self.find_actor_layered(start_state, goal_state)
+        else:
+            self.solution = self.find_actor_priority(start_state, goal_state)
+        self.runtime = (time.time_ns() - start_time) / 1e9
+        return self.solution
+
+    def check_budget(self, nodes: int = 0):
+        """Counts expanded actors and stops search when any budget is exceeded
+
+        Called by searches before every expansion, so cancellation and deadline
+        are noticed between steps.
+
+        Args:
+            nodes (int): number of actors about to be expanded
+
+        Raises:
+            Budget_exceeded: When limit of nodes or time is exceeded or search was cancelled
+        """
+        self.expanded_nodes += nodes
+        elapsed = time.monotonic() - self.started
+        if self.cancel_token is not None and self.cancel_token.cancelled:
+            reason = "cancelled"
+        elif self.max_nodes is not None and self.expanded_nodes > self.max_nodes:
+            reason = "nodes"
+        elif self.timeout is not None and elapsed > self.timeout:
+            reason = "time"
+        else:
+            return
+        raise self.budget_exceeded(reason)
+
+    def budget_exceeded(self, reason: str):
+        """Budget_exceeded with partial statistics of search
+
+        Args:
+            reason (str): "layers", "nodes", "time" or "cancelled"
+        """
+        stats = {
+            "expanded_nodes": self.expanded_nodes,
+            "layer": self.current_layer,
+            "elapsed": time.monotonic() - self.started,
+            "layer_stats": self.layer_stats,
+        }
+        return Budget_exceeded(self.start_id, self.goal_id, reason, stats)
+
+    def find_actor_center(self, start_state, goal_state):
+        """Reads path from precomputed shortest path tree when one of actors is center actor
+
+        Returns:
+            List | None: solution in the same format as find_actor or None when
+                neither actor is center actor, then regular search is needed
+        """
+        if self.graph is not None:
+            trees = get_center_trees()
+            if start_state in trees:
+                center, path = start_state, trees[start_state].path(goal_state)
+            elif goal_state in trees:
+                center, path = goal_state, trees[goal_state].path(start_state)
+            else:
+                return None
+            if path is None:
+                raise Not_connected(self.start_id, self.goal_id)
+            path = [self.to_solution(movie, actor) for movie, actor in path]
+        else:
+            path = self.get_center_path(start_state, goal_state)
+            if path is None:
+                return None
+            center, path = path
+
+        if len(path) > self.max_layer:
+            raise self.budget_exceeded("layers")
+        if center == start_state:
+            return [("", self.start_id)] + path
+        return reverse_solution([("", self.goal_id)] + path)
+
+    def get_center_path(self, start_id: int, goal_id: int):
+        """Follows parents in degrees table with one recursive query
+
+        Returns:
+            tuple | None: (center id, pairs of (movie, actor) from center), None if
+                neither actor is center actor
+        """
+        seed = (
+            ((Degrees.center_id == start_id) & (Degrees.actor_id == goal_id))
+            | ((Degrees.center_id == goal_id) & (Degrees.actor_id == start_id))
+        )
+        tree = (
+            select(Degrees.center_id, Degrees.actor_id, Degrees.parent_id, Degrees.movie_id, Degrees.distance)
+            .where(seed)
+            .cte("tree", recursive=True)
+        )
+        parent = aliased(Degrees)
+        tree = tree.union_all(
+            select(parent.center_id, parent.actor_id, parent.parent_id, parent.movie_id, parent.distance)
+            .join(tree, (parent.center_id == tree.c.center_id) & (parent.actor_id == tree.c.parent_id))
+        )
+        query = select(tree.c.center_id, tree.c.movie_id, tree.c.actor_id).order_by(
+            tree.c.center_id, tree.c.distance
+        )
+
+        rows = self.session.execute(query).all()
+        if not rows:
+            return None
+        center = rows[0][0]
+        path = [(movie, actor) for row_center, movie, actor in rows if row_center == center and movie is not None]
+        return center, path
+
+    def find_actor_priority(self, start_state, goal_state):
+        """Searches actor by actor with priority queue ordered by layer and movie count
+
+        Raises:
+            Budget_exceeded: When two actors can't find the way in max_layer steps
+            Exception: When all actors where searched
+
+        Returns:
+            List: List of pairs (movie, actors) in the same format as find_actor
+        """
+        start = Node(start_state)
+        marked = {start_state}
+        expanded = set()
         frontier = PriorityQueue()
         frontier.put((0, start))
-        start_time = time.time_ns()
         
         while True:
             if frontier.empty():
@@ -103,9 +490,9 @@ class Find_Actor_BFS:
                 print(f"\nQueue now on layer {node.layer}")
 
             if node.layer > self.max_layer:
-                raise Exception("Can't connect to actor in 6 steps")
+                raise self.budget_exceeded("layers")
 
-            if node.actor == self.goal_id:
+            if node.actor == goal_state:
                 actors = []
                 movies = []
                 while node.parent is not None:
@@ -114,55 +501,560 @@ class Find_Actor_BFS:
                     node = node.parent
                 actors.reverse()
                 movies.reverse()
-                self.solution = [(movie, actor) for movie, actor in zip(movies, actors)]
-                self.solution.insert(0, ("", self.start_id))
-                self.runtime = (time.time_ns() - start_time) / 1e9
-                return self.solution
+                return self.format_path(zip(movies, actors))
 
-            for movie, actor in self.get_neighbors(node.actor):
+            self.check_budget(1)
+            for movie, actor in self.get_neighbors(node.actor, expanded):
                 if actor in marked:
                     continue
                 marked.add(actor)
                 layer = node.layer + 1
                 child = Node(actor, node, movie, layer)
                 priority = (layer*1e3)-self.get_movie_count(actor)
-                if actor == self.goal_id:
+                if actor == goal_state:
                     frontier = Queue()
                     frontier.put((priority, child))
                     break
                 frontier.put((priority, child))
-            
+
+    def find_actor_vectorized(self, start_state, goal_state):
+        """Searches layer by layer with vectorized expansion over graph arrays
+
+        Raises:
+            Budget_exceeded: When two actors can't find the way in max_layer steps
+            Exception: When all actors where searched
+
+        Returns:
+            List: List of pairs (movie, actors) in the same format as find_actor
+        """
+        search = Graph_BFS(self.graph, start_state, self.direction, self.movie_mask, self.actor_mask)
+        self.search = search
+        self.layer_stats = search.stats
+        while not search.visited[goal_state]:
+            if search.layer >= self.max_layer:
+                raise self.budget_exceeded("layers")
+            self.check_budget(int(np.count_nonzero(search.frontier)))
+            if not search.step().size:
+                raise Exception("No solution")
+            self.current_layer = search.layer
+            print(f"\nQueue now on layer {self.current_layer} ({search.stats[-1]['direction']})")
+        return self.format_path(search.path(goal_state))
+
+    def find_actor_astar(self, start_state, goal_state):
+        """Goal-directed search using landmark lower bounds as heuristic
+
+        Without landmarks heuristic is zero and search expands actors by hops like BFS.
+
+        Raises:
+            Budget_exceeded: When two actors can't find the way in max_layer steps
+            Exception: When all actors where searched
+
+        Returns:
+            List: List of pairs (movie, actors) in the same format as find_actor
+        """
+        graph = self.graph
+        parents = {start_state: None}
+        cost = {start_state: 0}
+        closed = set()
+        heap = [(0, 0, start_state)]
+
+        while heap:
+            estimate, _, actor = heapq.heappop(heap)
+            if actor in closed:
+                continue
+            if actor == goal_state:
+                return self.build_solution(goal_state, parents)
+            if estimate > self.max_layer:
+                raise self.budget_exceeded("layers")
+            closed.add(actor)
+            self.check_budget(1)
+            self.current_layer = max(self.current_layer, cost[actor])
+
+            layer = cost[actor] + 1
+            movies = graph.movies_of(actor)
+            if self.movie_mask is not None:
+                movies = movies[self.movie_mask[movies]]
+            cast, owners = gather(graph.movie_offsets, graph.movie_actors, movies)
+            if self.actor_mask is not None:
+                allowed = self.actor_mask[cast]
+                cast, owners = cast[allowed], owners[allowed]
+            if self.landmarks is not None:
+                lower = self.landmarks.heuristic(cast, goal_state)
+            else:
+                lower = np.zeros(len(cast), dtype=np.int16)
+            for neighbor, owner, bound in zip(cast.tolist(), owners.tolist(), lower.tolist()):
+                if bound < 0 or neighbor in closed or cost.get(neighbor, layer + 1) <= layer:
+                    continue
+                cost[neighbor] = layer
+                parents[neighbor] = (int(movies[owner]), actor)
+                heapq.heappush(heap, (layer + bound, -layer, neighbor))
+
+        raise Exception("No solution")
+
+    def find_actor_weighted(self, start_state, goal_state):
+        """Dijkstra search with (hops, total movie weight) as lexicographic cost
+
+        Movies are nodes of search next to actors, so cast of every movie is
+        enumerated once, when its cheapest connecting actor is settled. Found
+        path has the fewest hops and the lowest weight among shortest paths;
+        weights come from get_movie_attributes, so no query is needed.
+
+        Raises:
+            Budget_exceeded: When two actors can't find the way in max_layer steps
+            Exception: When all actors reachable under constraints where searched
+
+        Returns:
+            List: List of pairs (movie, actors) in the same format as find_actor
+        """
+        graph = self.graph
+        weight = get_movie_attributes().weight
+        # search ending without actors cut by max_layer means goal is unreachable
+        pruned = False
+        num_actors = graph.num_actors
+        parents = {start_state: None}
+        movie_parent = {}
+        cost = {start_state: (0, 0)}
+        closed = set()
+        heap = [(0, 0, start_state)]
+
+        while heap:
+            hops, total, node = heapq.heappop(heap)
+            if node in closed:
+                continue
+            closed.add(node)
+
+            if node >= num_actors:
+                movie = node - num_actors
+                cast = graph.actors_of(movie)
+                if self.actor_mask is not None:
+                    cast = cast[self.actor_mask[cast]]
+                if self.landmarks is not None:
+                    lower = self.landmarks.heuristic(cast, goal_state)
+                    within = lower + hops <= self.max_layer
+                    pruned |= bool(((lower >= 0) & ~within).any())
+                    cast = cast[(lower >= 0) & within]
+                for actor in cast.tolist():
+                    if actor in closed or cost.get(actor, (hops + 1,)) <= (hops, total):
+                        continue
+                    cost[actor] = (hops, total)
+                    parents[actor] = (movie, movie_parent[movie])
+                    heapq.heappush(heap, (hops, total, actor))
+                continue
+
+            if node == goal_state:
+                return self.build_solution(goal_state, parents)
+            if hops >= self.max_layer:
+                pruned = True
+                continue
+            self.check_budget(1)
+            self.current_layer = max(self.current_layer, hops)
+
+            movies = graph.movies_of(node)
+            if self.movie_mask is not None:
+                movies = movies[self.movie_mask[movies]]
+            for movie, movie_weight in zip(movies.tolist(), weight[movies].tolist()):
+                key = (hops + 1, total + movie_weight)
+                movie += num_actors
+                if movie in closed or cost.get(movie, (key[0] + 1,)) <= key:
+                    continue
+                cost[movie] = key
+                movie_parent[movie - num_actors] = node
+                heapq.heappush(heap, (*key, movie))
+
+        if pruned:
+            raise self.budget_exceeded("layers")
+        raise Exception("No solution")
+
+    def find_actor_layered(self, start_state, goal_state):
+        """Searches layer by layer with one neighbor query per layer
+
+        Actors of a layer are expanded in order of their movie count,
+        the same order as priority queue of find_actor uses.
+
+        Raises:
+            Budget_exceeded: When two actors can't find the way in max_layer steps
+            Exception: When all actors where searched
+
+        Returns:
+            List: List of pairs (movie, actors) in the same format as find_actor
+        """
+        parents = {start_state: None}
+        frontier = [start_state]
+        expanded = set()
+        self.current_layer = 0
+
+        while goal_state not in parents:
+            if not frontier:
+                raise Exception("No solution")
+            if self.current_layer >= self.max_layer:
+                raise self.budget_exceeded("layers")
+            self.check_budget(len(frontier))
+            self.current_layer += 1
+            print(f"\nQueue now on layer {self.current_layer}")
+
+            movie_counts = {}
+            for source, movie, actor, movie_count in self.get_layer_neighbors(frontier, expanded):
+                if actor in parents:
+                    continue
+                parents[actor] = (movie, source)
+                movie_counts[actor] = movie_count
+                if actor == goal_state:
+                    break
+            frontier = sorted(movie_counts, key=lambda actor: -movie_counts[actor])
+
+        return self.build_solution(goal_state, parents)
+
+    def build_solution(self, actor, parents: dict):
+        """Follows parents from actor back to start actor
+
+        Args:
+            actor: last actor of path
+            parents (dict): actor -> (common movie, previous actor), None for start actor
+
+        Returns:
+            List: List of pairs (movie, actors) in the same format as find_actor
+        """
+        path = []
+        while parents[actor] is not None:
+            movie, previous = parents[actor]
+            path.append((movie, actor))
+            actor = previous
+        path.reverse()
+        return self.format_path(path)
+
+    def format_path(self, path):
+        """Converts path of search states to solution starting with ("", start_id)
+
+        Args:
+            path (Iterable): pairs of (movie, actor) states after start actor
+
+        Returns:
+            List: List of pairs (movie, actors) in the same format as find_actor
+        """
+        solution = [self.to_solution(movie, actor) for movie, actor in path]
+        solution.insert(0, ("", self.start_id))
+        return solution
+
+    def expand_layer(self, frontier: list, parents: dict, other_parents: dict, expanded: set):
+        """Expands whole layer of one side of bidirectional search
+
+        Args:
+            frontier (list): actors of current layer
+            parents (dict): actor -> (common movie, previous actor) of expanded side
+            other_parents (dict): parents of opposite side
+            expanded (set): movies already enumerated by expanded side
+
+        Returns:
+            tuple: (next layer, actor where both sides met or None)
+        """
+        self.check_budget(len(frontier))
+        if self.mode == "sql_batch":
+            pairs = (
+                (actor, movie, neighbor)
+                for actor, movie, neighbor, _ in self.get_layer_neighbors(frontier, expanded)
+            )
+        else:
+            pairs = (
+                (actor, movie, neighbor)
+                for actor in frontier
+                for movie, neighbor in self.get_neighbors(actor, expanded)
+            )
+
+        next_frontier = []
+        for actor, movie, neighbor in pairs:
+            if neighbor in parents:
+                continue
+            parents[neighbor] = (movie, actor)
+            if neighbor in other_parents:
+                return next_frontier, neighbor
+            next_frontier.append(neighbor)
+        return next_frontier, None
+
+    def find_actor_bidirectional(self, start_state, goal_state):
+        """Searches from both actors at once, always expanding smaller frontier
+
+        Since whole layers are expanded, first meeting of both sides is on a shortest path.
+
+        Raises:
+            Budget_exceeded: When two actors can't find the way in max_layer steps
+            Exception: When all actors where searched
+
+        Returns:
+            List: List of pairs (movie, actors) in the same format as find_actor
+        """
+        if self.mode == "vectorized":
+            return self.find_actor_bidirectional_vectorized(start_state, goal_state)
+
+        forward_parents = {start_state: None}
+        backward_parents = {goal_state: None}
+        forward, backward = [start_state], [goal_state]
+        forward_expanded, backward_expanded = set(), set()
+        meeting = None
+        self.current_layer = 0
+
+        while meeting is None:
+            if not forward or not backward:
+                raise Exception("No solution")
+            if self.current_layer >= self.max_layer:
+                raise self.budget_exceeded("layers")
+            self.current_layer += 1
+            print(f"\nQueue now on layer {self.current_layer}")
+            if len(forward) <= len(backward):
+                forward, meeting = self.expand_layer(
+                    forward, forward_parents, backward_parents, forward_expanded
+                )
+            else:
+                backward, meeting = self.expand_layer(
+                    backward, backward_parents, forward_parents, backward_expanded
+                )
+
+        solution = self.build_solution(meeting, forward_parents)
+        actor = meeting
+        while backward_parents[actor] is not None:
+            movie, following = backward_parents[actor]
+            solution.append(self.to_solution(movie, following))
+            actor = following
+        return solution
+
+    def find_actor_bidirectional_vectorized(self, start_state, goal_state):
+        """Bidirectional search where both sides are vectorized searches
+
+        Returns:
+            List: List of pairs (movie, actors) in the same format as find_actor
+        """
+        forward = Graph_BFS(self.graph, start_state, self.direction, self.movie_mask, self.actor_mask)
+        backward = Graph_BFS(self.graph, goal_state, self.direction, self.movie_mask, self.actor_mask)
+        meeting = np.flatnonzero((forward.distance >= 0) & (backward.distance >= 0))
+
+        while not meeting.size:
+            if forward.layer + backward.layer >= self.max_layer:
+                raise self.budget_exceeded("layers")
+            if np.count_nonzero(forward.frontier) <= np.count_nonzero(backward.frontier):
+                search = forward
+            else:
+                search = backward
+            self.check_budget(int(np.count_nonzero(search.frontier)))
+            new = search.step()
+            self.layer_stats.append({**search.stats[-1], "side": "forward" if search is forward else "backward"})
+            if not new.size:
+                raise Exception("No solution")
+            self.current_layer = forward.layer + backward.layer
+            print(f"\nQueue now on layer {self.current_layer} ({search.stats[-1]['direction']})")
+            meeting = np.flatnonzero(forward.visited[new] & backward.visited[new])
+            meeting = new[meeting]
+
+        meeting = int(meeting[0])
+        backward_path = backward.path(meeting)
+        actors = [goal_state] + [actor for _, actor in backward_path[:-1]]
+        path = forward.path(meeting)
+        path += [(movie, actor) for (movie, _), actor in zip(reversed(backward_path), reversed(actors))]
+        return self.format_path(path)
+
+    def find_actor_paths(self, k: int = 10, max_steps: int = 100000):
+        """Finds up to k distinct shortest paths between actors
+
+        One vectorized search from start actor gives distances of all actors
+        up to the goal layer. Shortest paths are then enumerated backwards from
+        goal actor over predecessors one layer closer to start, which form
+        the shortest-path DAG. Predecessors are ordered by movie and actor
+        index, so order of paths is stable.
+
+        Args:
+            k (int): maximum number of paths. Defaults to 10.
+            max_steps (int): maximum number of DAG edges followed during enumeration,
+                fewer than k paths are returned when it is exceeded. Defaults to 100000.
+
+        Raises:
+            Not_connected: When actors are in different connected components
+            Budget_exceeded: When two actors can't find the way in max_layer steps
+
+        Returns:
+            List: solutions in the same format as find_actor
+        """
+        if self.graph is None:
+            raise ValueError(f"Enumerating paths is not supported in {self.mode} mode")
+        start_state = self.to_state(self.start_id)
+        goal_state = self.to_state(self.goal_id)
+        if self.start_id == self.goal_id:
+            return [[("", self.start_id)]]
+        if not self.connected(start_state, goal_state):
+            raise Not_connected(self.start_id, self.goal_id)
+
+        self.started = time.monotonic()
+        self.expanded_nodes = 0
+        self.find_actor_vectorized(start_state, goal_state)
+        distance = self.search.distance
+        graph = self.graph
+        predecessors = {}
+
+        def get_predecessors(actor):
+            if actor not in predecessors:
+                movies = graph.movies_of(actor)
+                if self.movie_mask is not None:
+                    movies = movies[self.movie_mask[movies]]
+                cast, owners = gather(graph.movie_offsets, graph.movie_actors, movies)
+                previous = np.flatnonzero(distance[cast] == distance[actor] - 1)
+                movies, cast = movies[owners[previous]], cast[previous]
+                order = np.lexsort((cast, movies))
+                predecessors[actor] = list(zip(movies[order].tolist(), cast[order].tolist()))
+            return predecessors[actor]
+
+        steps = 0
+
+        def paths_to(actor):
+            nonlocal steps
+            if actor == start_state:
+                yield []
+                return
+            for movie, previous in get_predecessors(actor):
+                steps += 1
+                if steps > max_steps:
+                    return
+                for path in paths_to(previous):
+                    yield path + [(movie, actor)]
+
+        solutions = []
+        for path in paths_to(goal_state):
+            solutions.append(self.format_path(path))
+            if len(solutions) >= k:
+                break
+        if solutions:
+            self.solution = solutions[0]
+        return solutions
+
     @classmethod
-    def run(cls, start_id, goal_id, return_instance = False, print_solution = False):
+    def run(cls, start_id, goal_id, return_instance = False, print_solution = False, mode = "vectorized", bidirectional = False, direction = "auto", cache: Path_cache | None = default_cache, **options):
         """Class method for easier running the algorithm 
 
         Args:
-            start_id (str): start_id for init method
-            goal_id (str): goal_id for init method
+            start_id (int): start_id for init method
+            goal_id (int): goal_id for init method
+            mode (str, optional): mode for init method. Defaults to "vectorized".
+            bidirectional (bool, optional): bidirectional for init method. Defaults to False.
+            direction (str, optional): direction for init method. Defaults to "auto".
             return_instance (bool, optional): Boolean to decide if method will return additionally instance. Defaults to False.
+            cache (Path_cache | None, optional): Cache of solutions for graph dataset, None disables it. Defaults to default_cache.
+            **options: max_layer, max_nodes, timeout, cancel_token and constraints for init method.
 
         Returns:
             tuple: Default: Tuple with results; if return_instance: returns tuple (instance , results) 
         """
-        inst = cls(start_id, goal_id)
-        results = inst.find_actor()
+        inst = cls(start_id, goal_id, mode, bidirectional, direction, **options)
+        start_time = time.time_ns()
+        results = cache.get(start_id, goal_id, inst.cache_version) if cache is not None else None
+        if results is not None and len(results) - 1 > inst.max_layer:
+            results = None
+        if results is None:
+            results = inst.find_actor()
+            if cache is not None:
+                cache.set(start_id, goal_id, inst.cache_version, results)
+        else:
+            inst.solution = results
+            inst.runtime = (time.time_ns() - start_time) / 1e9
         if print_solution:
             inst.print_solution()
         if return_instance:
             return inst, results
         return results
         
+    @classmethod
+    def run_batch(
+        cls,
+        pairs: Iterable,
+        max_layer: int | None = 6,
+        direction: str = "auto",
+        cache: Path_cache | None = default_cache,
+    ):
+        """Finds paths for many pairs of actors with one search per start actor
+
+        Pairs are grouped by start actor and every group shares single vectorized
+        search, which is expanded until all goals of the group are found.
+
+        Args:
+            pairs (Iterable): pairs of (start_id, goal_id)
+            max_layer (int | None, optional): Maximum length of path, None searches whole component. Defaults to 6.
+            direction (str, optional): Direction of search, see Graph_BFS. Defaults to "auto".
+            cache (Path_cache | None, optional): Cache filled with found solutions. Defaults to default_cache.
+
+        Yields:
+            tuple: (start_id, goal_id, solution) as soon as solution is found, once for
+                every pair including repeated ones; solution is None when actors can't
+                be connected in max_layer steps
+        """
+        graph = get_graph()
+        groups = {}
+        for start_id, goal_id in pairs:
+            groups.setdefault(start_id, []).append(goal_id)
+
+        for start_id, goal_ids in groups.items():
+            start = graph.actor_index(start_id)
+            pending = {}
+            for goal_id in goal_ids:
+                goal = graph.actor_index(goal_id)
+                if goal_id == start_id:
+                    yield start_id, goal_id, [("", start_id)]
+                elif start is None or goal is None or not graph.connected(start, goal):
+                    yield start_id, goal_id, None
+                else:
+                    pending.setdefault(goal, []).append(goal_id)
+            if not pending:
+                continue
+
+            search = Graph_BFS(graph, start, direction)
+            while pending:
+                if max_layer is not None and search.layer >= max_layer:
+                    break
+                new = search.step()
+                if not new.size:
+                    break
+                found = [goal for goal in pending if search.visited[goal]]
+                for goal in found:
+                    solution = [("", start_id)] + [
+                        (graph.movie_id(movie), graph.actor_id(actor))
+                        for movie, actor in search.path(goal)
+                    ]
+                    for goal_id in pending.pop(goal):
+                        if cache is not None:
+                            cache.set(start_id, goal_id, graph.dataset, solution)
+                        yield start_id, goal_id, solution
+
+            for goal_ids in pending.values():
+                for goal_id in goal_ids:
+                    yield start_id, goal_id, None
+
+    @classmethod
+    def run_paths(cls, start_id, goal_id, k: int = 10, max_steps: int = 100000, mode: str = "vectorized", **options):
+        """Class method for finding up to k alternative shortest paths
+
+        Args:
+            start_id (int): start_id for init method
+            goal_id (int): goal_id for init method
+            k (int, optional): k for find_actor_paths. Defaults to 10.
+            max_steps (int, optional): max_steps for find_actor_paths. Defaults to 100000.
+            mode (str, optional): mode for init method, must be one of graph modes. Defaults to "vectorized".
+            **options: max_layer, max_nodes, timeout, cancel_token and constraints for init method.
+
+        Returns:
+            List: solutions, each can be rendered by format_results
+        """
+        inst = cls(start_id, goal_id, mode, **options)
+        return inst.find_actor_paths(k, max_steps)
+
     def print_solution(self):
         """Prints solution and runtime of function
         """
         print()
         print(f"{self.runtime:.3f}")
+        for stats in self.layer_stats:
+            print(", ".join(f"{key}: {value}" for key, value in stats.items()))
         for movie, actor in self.solution:
             print(movie, actor)
 
 
 def main():
-    obj = Find_Actor_BFS.run("nm1500155", "nm3053338", return_instance=True, print_solution=True)
+    obj = Find_Actor_BFS.run(
+        to_key("nm1500155"), to_key("nm3053338"), return_instance=True, print_solution=True
+    )
 
 
 if __name__ == "__main__":
@@ -0,0 +1,206 @@
+import os
+import time
+import multiprocessing as mp
+import numpy as np
+import pandas as pd
+from database.graph import Cast_graph, Graph_BFS, data_dir, snapshot_path
+
+analytics_dir = os.path.join(data_dir, "analytics")
+
+graph = None
+
+
+def init_worker(file_path: str):
+    """Opens memory-mapped snapshot once per worker
+
+    Arrays of snapshot are mapped from the same file, so all workers share
+    single copy of graph in page cache instead of pickled copies.
+    """
+    global graph
+    graph = Cast_graph.open(file_path)
+
+
+def source_stats(source: int):
+    """Runs whole-component search from source actor
+
+    Returns:
+        tuple: (source, histogram of distances, eccentricity, reached actors, sum of distances)
+    """
+    search = Graph_BFS(graph, source)
+    search.run()
+    distance = search.distance[search.visited]
+    histogram = np.bincount(distance)
+    return source, histogram, int(distance.max()), len(distance), int(distance.sum(dtype=np.int64))
+
+
+class Graph_analytics:
+    def __init__(
+        self,
+        file_path: str = snapshot_path,
+        num_processes: int = mp.cpu_count(),
+        seed: int | None = None,
+    ) -> None:
+        """Init of Graph_analytics class
+
+        Network statistics of co-star graph computed with many independent
+        searches spread over pool of processes.
+
+        Args:
+            file_path (str): path of graph snapshot. Defaults to snapshot_path.
+            num_processes (int): size of process pool. Defaults to mp.cpu_count().
+            seed (int | None): seed of source sampling. Defaults to None.
+        """
+        self.file_path = file_path
+        self.graph = Cast_graph.open(file_path)
+        self.num_processes = num_processes
+        self.rng = np.random.default_rng(seed)
+
+    def degree_distribution(self):
+        """Number of actors for every movie count"""
+        counts = np.bincount(self.graph.movie_counts)
+        movie_count = np.flatnonzero(counts)
+        return pd.DataFrame({"movie_count": movie_count, "actors": counts[movie_count]})
+
+    def sample_sources(self, samples: int):
+        """Uniform sample of actors from the largest connected component"""
+        actors = np.flatnonzero(np.asarray(self.graph.component) == 0)
+        samples = min(samples, len(actors))
+        return self.rng.choice(actors, samples, replace=False)
+
+    def top_sources(self, top: int):
+        """Actors with the most movies"""
+        order = np.argsort(-self.graph.movie_counts, kind="stable")
+        return order[:top]
+
+    def run_searches(self, sources: np.ndarray):
+        """Runs search from every source in process pool
+
+        Yields:
+            tuple: results of source_stats in order of completion
+        """
+        sources = [int(source) for source in sources]
+        chunksize = max(1, len(sources) // (self.num_processes * 4))
+        with mp.Pool(
+            processes=self.num_processes,
+            initializer=init_worker,
+            initargs=(self.file_path,),
+        ) as pool:
+            yield from pool.imap_unordered(source_stats, sources, chunksize)
+
+    def compute(self, samples: int = 1000, top: int = 100):
+        """Computes distance histogram and centrality of sampled and top actors
+
+        Distances from sampled actors estimate distribution of separation
+        between all pairs of the largest component; top actors get exact
+        closeness and eccentricity.
+
+        Args:
+            samples (int): number of random sources. Defaults to 1000.
+            top (int): number of actors with the most movies. Defaults to 100.
+
+        Returns:
+            tuple: data frames (distance histogram, centrality)
+        """
+        sampled = set(int(source) for source in self.sample_sources(samples))
+        ranked = set(int(source) for source in self.top_sources(top))
+
+        histogram = np.zeros(1, dtype=np.int64)
+        rows = []
+        for source, counts, eccentricity, reached, total in self.run_searches(
+            sorted(sampled | ranked)
+        ):
+            if source in sampled:
+                if len(counts) > len(histogram):
+                    histogram = np.pad(histogram, (0, len(counts) - len(histogram)))
+                histogram[: len(counts)] += counts
+            rows.append(
+                {
+                    "actor_id": self.graph.actor_id(source),
+                    "movie_count": int(self.graph.movie_counts[source]),
+                    "sampled": source in sampled,
+                    "top": source in ranked,
+                    "reached": reached,
+                    "eccentricity": eccentricity,
+                    "average_distance": total / (reached - 1) if reached > 1 else None,
+                    "closeness": (reached - 1) / total if total else None,
+                }
+            )
+
+        # distance 0 counts sources themselves
+        histogram[0] = 0
+        distances = pd.DataFrame({"distance": np.arange(len(histogram)), "pairs": histogram})
+        distances = distances[distances["pairs"] > 0].reset_index(drop=True)
+        distances["share"] = distances["pairs"] / distances["pairs"].sum()
+
+        centrality = pd.DataFrame(rows)
+        if not centrality.empty:
+            centrality.sort_values("closeness", ascending=False, inplace=True)
+        return distances, centrality
+
+    def run(self, samples: int = 1000, top: int = 100, load_db: bool = False):
+        """Computes all statistics and writes them to csv files (and database)"""
+        start_time = time.time_ns()
+        degrees = self.degree_distribution()
+        distances, centrality = self.compute(samples, top)
+
+        os.makedirs(analytics_dir, exist_ok=True)
+        tables = {
+            "degree_distribution": degrees,
+            "distance_histogram": distances,
+            "centrality": centrality,
+        }
+        for table, frame in tables.items():
+            frame.to_csv(os.path.join(analytics_dir, f"{table}.csv"), index=False, lineterminator="\n")
+
+        if load_db:
+            from database.database import engine
+
+            for table, frame in tables.items():
+                frame.to_sql(f"analytics_{table}", engine, if_exists="replace", index=False)
+
+        if not distances.empty:
+            separation = (distances["distance"] * distances["share"]).sum()
+            print(f"Average separation: {separation:.3f}")
+        if not centrality.empty:
+            print(f"Largest eccentricity: {centrality['eccentricity'].max()}")
+        print(f"Runtime: {(time.time_ns() - start_time)/1e9:.3f}")
+        return tables
+
+
+def load_args():
+    import argparse
+
+    parser = argparse.ArgumentParser(
+        description="Script to compute network statistics of co-star graph snapshot"
+    )
+    parser.add_argument(
+        "-s", "--samples", type=int, default=1000, help="Number of random source actors."
+    )
+    parser.add_argument(
+        "-t", "--top", type=int, default=100, help="Number of actors with the most movies."
+    )
+    parser.add_argument(
+        "-p",
+        "--processes",
+        type=int,
+        default=mp.cpu_count(),
+        help="Number of worker processes.",
+    )
+    parser.add_argument("--seed", type=int, default=None, help="Seed of source sampling.")
+    parser.add_argument(
+        "-L", "--load", action="store_true", help="Enable writing results to the database."
+    )
+    parser.add_argument(
+        "-f", "--file", default=snapshot_path, help="Path of graph snapshot."
+    )
+    return parser.parse_args()
+
+
+def main():
+    args = load_args()
+    analytics = Graph_analytics(args.file, args.processes, args.seed)
+    analytics.run(args.samples, args.top, args.load)
+
+
+if __name__ == "__main__":
+    main()
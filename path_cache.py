@@ -0,0 +1,120 @@
+import threading
+from collections import OrderedDict
+
+
+class Memory_backend:
+    def __init__(self, max_size: int = 1024) -> None:
+        """Init of Memory_backend class
+
+        Process-wide LRU dictionary
+
+        Args:
+            max_size (int): maximum number of stored paths. Defaults to 1024.
+        """
+        self.max_size = max_size
+        self.items = OrderedDict()
+        self.lock = threading.Lock()
+
+    def get(self, key: str):
+        with self.lock:
+            if key not in self.items:
+                return None
+            self.items.move_to_end(key)
+            return self.items[key]
+
+    def set(self, key: str, value):
+        with self.lock:
+            self.items[key] = value
+            self.items.move_to_end(key)
+            while len(self.items) > self.max_size:
+                self.items.popitem(last=False)
+
+    def clear(self):
+        with self.lock:
+            self.items.clear()
+
+
+class Django_backend:
+    def __init__(self, alias: str = "default", timeout: int | None = None) -> None:
+        """Init of Django_backend class
+
+        Stores paths in cache of Django cache framework, which handles size and eviction
+
+        Args:
+            alias (str): alias of cache from CACHES setting. Defaults to "default".
+            timeout (int | None): seconds to keep paths, None keeps them until evicted. Defaults to None.
+        """
+        self.alias = alias
+        self.timeout = timeout
+
+    @property
+    def cache(self):
+        from django.core.cache import caches
+
+        return caches[self.alias]
+
+    def get(self, key: str):
+        return self.cache.get(key)
+
+    def set(self, key: str, value):
+        self.cache.set(key, value, self.timeout)
+
+    def clear(self):
+        self.cache.clear()
+
+
+def reverse_solution(solution: list):
+    """Reverses solution, so it starts from goal actor
+
+    Args:
+        solution (list): pairs (movie, actor) with ("", start actor) first
+
+    Returns:
+        list: pairs (movie, actor) with ("", goal actor) first
+    """
+    movies = [movie for movie, _ in solution[1:]]
+    actors = [actor for _, actor in solution]
+    actors.reverse()
+    movies.reverse()
+    return [("", actors[0])] + list(zip(movies, actors[1:]))
+
+
+class Path_cache:
+    def __init__(self, backend=None) -> None:
+        """Init of Path_cache class
+
+        Shortest paths keyed by unordered pair of actors and version of dataset,
+        so reversed queries hit the same entry and new data never reads old paths.
+
+        Args:
+            backend (optional): object with get, set and clear methods. Defaults to Memory_backend().
+        """
+        self.backend = backend if backend is not None else Memory_backend()
+
+    @staticmethod
+    def key(start_id: int, goal_id: int, version: str):
+        first, second = sorted((start_id, goal_id))
+        return f"star_connections:path:{version}:{first}:{second}"
+
+    def get(self, start_id: int, goal_id: int, version: str | None):
+        """Returns cached solution from start to goal or None"""
+        if version is None:
+            return None
+        solution = self.backend.get(self.key(start_id, goal_id, version))
+        if solution is None:
+            return None
+        solution = [tuple(pair) for pair in solution]
+        if solution[0][1] != start_id:
+            return reverse_solution(solution)
+        return solution
+
+    def set(self, start_id: int, goal_id: int, version: str | None, solution: list):
+        if version is None:
+            return
+        self.backend.set(self.key(start_id, goal_id, version), solution)
+
+    def clear(self):
+        self.backend.clear()
+
+
+default_cache = Path_cache()
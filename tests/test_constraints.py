@@ -0,0 +1,69 @@
+import unittest
+import numpy as np
+from database.constraints import Constraints
+from find_actors import Budget_exceeded
+from tests.toy import SEARCHES, check_path, find, searching, toy_attributes, toy_graph
+
+
+class Constraints_test(unittest.TestCase):
+    def check_path_length(self, constraints, start_id, goal_id, length):
+        graph = toy_graph()
+        with searching(graph):
+            for mode, bidirectional, direction in SEARCHES:
+                with self.subTest(mode=mode, bidirectional=bidirectional, direction=direction):
+                    solution = find(start_id, goal_id, mode, bidirectional, direction, constraints=constraints)
+                    self.assertEqual(len(solution) - 1, length)
+                    check_path(self, graph, solution, start_id, goal_id)
+                    movies = {movie for movie, _ in solution[1:]}
+                    actors = {actor for _, actor in solution}
+                    self.assertFalse(movies & set(constraints.exclude_movies))
+                    self.assertFalse(actors & set(constraints.exclude_actors))
+
+    def test_excluded_movie(self):
+        # shortcut 1-7-5 goes through movie 5
+        self.check_path_length(Constraints(exclude_movies=[5]), 1, 5, 4)
+
+    def test_excluded_actor(self):
+        self.check_path_length(Constraints(exclude_actors=[7]), 1, 5, 4)
+
+    def test_year_and_votes(self):
+        # toy movies start in 2000 + id and have 10 * id votes
+        self.check_path_length(Constraints(max_year=2004), 1, 5, 4)
+        self.check_path_length(Constraints(min_votes=50), 1, 5, 2)
+
+    def test_goal_unreachable_under_constraints(self):
+        with searching(toy_graph()):
+            for mode, bidirectional, direction in SEARCHES:
+                with self.subTest(mode=mode, bidirectional=bidirectional, direction=direction):
+                    with self.assertRaises(Exception) as raised:
+                        find(1, 6, mode, bidirectional, direction, constraints=Constraints(exclude_movies=[4]))
+                    self.assertNotIsInstance(raised.exception, Budget_exceeded)
+                    self.assertIn("No solution", str(raised.exception))
+
+    def test_excluded_or_missing_end_actor(self):
+        with searching(toy_graph()):
+            with self.assertRaisesRegex(ValueError, "excluded"):
+                find(1, 5, constraints=Constraints(exclude_actors=[5]))
+            with self.assertRaisesRegex(ValueError, "not in cast"):
+                find(100, 100, constraints=Constraints(exclude_actors=[5]))
+
+    def test_masks(self):
+        graph = toy_graph()
+        attributes = toy_attributes(graph)
+        mask = Constraints(min_year=2002, max_year=2005, exclude_movies=[3]).movie_mask(attributes, graph)
+        self.assertEqual(graph.movie_ids[mask].tolist(), [2, 4, 5])
+        self.assertFalse(Constraints(regions=["PL"]).movie_mask(attributes, graph).any())
+        self.assertTrue(Constraints(regions=["US"]).movie_mask(attributes, graph).all())
+        mask = Constraints(exclude_actors=[2, 100]).actor_mask(graph)
+        self.assertEqual(np.flatnonzero(~mask).tolist(), [graph.actor_index(2)])
+
+    def test_equality_and_key(self):
+        self.assertEqual(Constraints(exclude_movies=[5, 3, 5]), Constraints(exclude_movies=[3, 5]))
+        self.assertEqual(hash(Constraints(regions=["US", "PL"])), hash(Constraints(regions=["PL", "US"])))
+        self.assertNotEqual(Constraints(min_year=2000), Constraints(max_year=2000))
+        self.assertFalse(Constraints())
+        self.assertEqual(str(Constraints(min_year=2000, exclude_actors=[2, 1])), "min_year=2000;exclude_actors=1,2")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,157 @@
+import os
+import tempfile
+import unittest
+from collections import deque
+import numpy as np
+import pandas as pd
+from database.graph import Cast_graph, Graph_BFS, Snapshot_error, open_arrays
+from tests.toy import random_graph, toy_graph
+
+
+class Cast_graph_test(unittest.TestCase):
+    def test_csr_arrays(self):
+        graph = toy_graph()
+        self.assertEqual(graph.actor_ids.tolist(), list(range(1, 10)))
+        self.assertEqual(graph.movie_ids.tolist(), list(range(1, 8)))
+        actor = graph.actor_index(1)
+        movies = sorted(graph.movie_id(movie) for movie in graph.movies_of(actor))
+        self.assertEqual(movies, [1, 5])
+        cast = sorted(graph.actor_id(a) for a in graph.actors_of(graph.movie_indices([4])[0]))
+        self.assertEqual(cast, [4, 5, 6])
+        self.assertEqual(graph.movie_counts.tolist(), [2, 2, 2, 2, 2, 1, 2, 1, 1])
+
+    def test_duplicate_rows_are_single_edge(self):
+        cast = pd.DataFrame({"movie_id": [1, 1, 1], "actor_id": [1, 2, 1]})
+        graph = Cast_graph.from_frame(cast)
+        self.assertEqual(len(graph.actor_movies), 2)
+        self.assertEqual(graph.movie_counts.tolist(), [1, 1])
+
+    def test_neighbors(self):
+        graph = toy_graph()
+        neighbors = {
+            (graph.movie_id(movie), graph.actor_id(actor))
+            for movie, actor in graph.neighbors(graph.actor_index(1))
+        }
+        self.assertEqual(neighbors, {(1, 2), (5, 7)})
+
+    def test_lookups_of_missing_ids(self):
+        graph = toy_graph()
+        self.assertIsNone(graph.actor_index(100))
+        self.assertEqual(graph.actor_indices([1, 100, 9]).tolist(), [0, -1, 8])
+        self.assertEqual(graph.movie_indices([0, 7]).tolist(), [-1, 6])
+
+    def test_components(self):
+        graph = toy_graph()
+        self.assertEqual(graph.component_sizes.tolist(), [7, 2])
+        self.assertTrue(graph.connected(graph.actor_index(1), graph.actor_index(6)))
+        self.assertFalse(graph.connected(graph.actor_index(1), graph.actor_index(8)))
+
+    def test_snapshot_round_trip(self):
+        graph = toy_graph()
+        with tempfile.TemporaryDirectory() as directory:
+            file_path = os.path.join(directory, "graph.bin")
+            graph.save(file_path)
+            opened = Cast_graph.open(file_path, verify=True)
+            self.assertEqual(opened.dataset, "toy")
+            for name in ("actor_ids", "movie_ids", "actor_offsets", "actor_movies", "movie_offsets", "movie_actors"):
+                np.testing.assert_array_equal(getattr(opened, name), getattr(graph, name))
+            np.testing.assert_array_equal(opened.component, graph.component)
+            del opened
+
+    def test_corrupted_snapshot(self):
+        with tempfile.TemporaryDirectory() as directory:
+            file_path = os.path.join(directory, "graph.bin")
+            toy_graph().save(file_path)
+            arrays, _ = open_arrays(file_path)
+            offset = arrays["actor_ids"].offset
+            del arrays
+            with open(file_path, "r+b") as f:
+                f.seek(offset)
+                first = f.read(1)
+                f.seek(offset)
+                f.write(bytes([first[0] ^ 0xFF]))
+            with self.assertRaises(Snapshot_error):
+                Cast_graph.open(file_path, verify=True)
+            with open(file_path, "r+b") as f:
+                f.write(b"NOTGRAPH")
+            with self.assertRaises(Snapshot_error):
+                Cast_graph.open(file_path)
+
+
+def reference_distances(graph: Cast_graph, source: int, actor_mask=None):
+    """Plain queue BFS over neighbors of graph"""
+    distance = np.full(graph.num_actors, -1)
+    distance[source] = 0
+    queue = deque([source])
+    while queue:
+        actor = queue.popleft()
+        for _, neighbor in graph.neighbors(actor, actor_mask=actor_mask):
+            if distance[neighbor] < 0:
+                distance[neighbor] = distance[actor] + 1
+                queue.append(neighbor)
+    return distance
+
+
+class Graph_BFS_test(unittest.TestCase):
+    def test_directions_match_reference(self):
+        for seed in range(4):
+            graph = random_graph(seed, num_movies=200, num_actors=250, cast_size=4)
+            for source in (0, 17, graph.num_actors - 1):
+                expected = reference_distances(graph, source)
+                for direction in Graph_BFS.DIRECTIONS:
+                    with self.subTest(seed=seed, source=source, direction=direction):
+                        search = Graph_BFS(graph, source, direction)
+                        self.assertTrue(search.run())
+                        np.testing.assert_array_equal(search.distance, expected)
+                        directions = {stats["direction"] for stats in search.stats}
+                        if direction != "auto":
+                            self.assertEqual(directions, {direction})
+
+    def test_auto_switches_direction(self):
+        graph = random_graph(0, num_movies=400, num_actors=200, cast_size=4)
+        search = Graph_BFS(graph, 0, "auto")
+        search.run()
+        directions = [stats["direction"] for stats in search.stats]
+        self.assertIn("bottom_up", directions)
+        self.assertEqual(directions[0], "top_down")
+
+    def test_paths_follow_parents(self):
+        graph = random_graph(1, num_movies=200, num_actors=250, cast_size=4)
+        for direction in Graph_BFS.DIRECTIONS:
+            search = Graph_BFS(graph, 0, direction)
+            search.run()
+            for actor in np.flatnonzero(search.distance > 0):
+                path = search.path(int(actor))
+                self.assertEqual(len(path), search.distance[actor])
+                previous = 0
+                for movie, current in path:
+                    self.assertIn(previous, graph.actors_of(movie))
+                    self.assertIn(current, graph.actors_of(movie))
+                    previous = current
+
+    def test_stops_at_goal_and_max_layer(self):
+        graph = toy_graph()
+        search = Graph_BFS(graph, 0)
+        self.assertTrue(search.run(goal=graph.actor_index(5)))
+        self.assertEqual(search.layer, 2)
+        search = Graph_BFS(graph, 0)
+        self.assertFalse(search.run(goal=graph.actor_index(4), max_layer=2))
+        self.assertFalse(Graph_BFS(graph, 0).run(goal=graph.actor_index(8)))
+
+    def test_actor_mask(self):
+        graph = random_graph(2, num_movies=200, num_actors=250, cast_size=4)
+        actor_mask = np.ones(graph.num_actors, dtype=bool)
+        actor_mask[1::3] = False
+        expected = reference_distances(graph, 0, actor_mask)
+        for direction in Graph_BFS.DIRECTIONS:
+            search = Graph_BFS(graph, 0, direction, actor_mask=actor_mask)
+            search.run()
+            np.testing.assert_array_equal(search.distance, expected)
+
+    def test_unknown_direction(self):
+        with self.assertRaises(ValueError):
+            Graph_BFS(toy_graph(), 0, "sideways")
+
+
+if __name__ == "__main__":
+    unittest.main()
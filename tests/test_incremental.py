@@ -0,0 +1,94 @@
+import os
+import tempfile
+import unittest
+import pandas as pd
+from database.shards import pq, shard_name, write_manifest, write_shard
+from tests.toy import toy_parser
+
+MOVIES = pd.DataFrame(
+    {"id": [1, 2, 3], "original_title": ["First", "Second", "Third"], "start_year": [2001, 2002, 2003]}
+)
+CAST = pd.DataFrame(
+    {"movie_id": [1, 1, 2], "actor_id": [1, 2, 3], "characters": ["A", "B", "C"]}
+)
+
+
+def write_table(directory: str, table: str, frame: pd.DataFrame, file_format: str = "csv", shards: int = 1):
+    """Writes frame as single file of table or as shards listed in manifest"""
+    if shards == 1:
+        write_shard(frame, os.path.join(directory, f"{table}.{file_format}"), table)
+        return
+    entries = []
+    for index in range(shards):
+        part = frame.iloc[index::shards]
+        file = shard_name(table, index, file_format)
+        write_shard(part, os.path.join(directory, file), table)
+        entries.append({"file": file, "rows": len(part)})
+    write_manifest(directory, table, entries)
+
+
+class Diff_table_test(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.parser = toy_parser(self.directory.name)
+        os.mkdir(self.parser.previous_dir)
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def diff(self, table, new, old, **kwargs):
+        if new is not None:
+            write_table(self.parser.transformed_dir, table, new, **kwargs)
+        if old is not None:
+            write_table(self.parser.previous_dir, table, old)
+        return self.parser.diff_table(table)
+
+    def test_updated_table(self):
+        new = pd.DataFrame(
+            {"id": [1, 2, 4], "original_title": ["First", "Second!", "Fourth"], "start_year": [2001, 2002, 2004]}
+        )
+        inserted, updated, deleted = self.diff("movies", new, MOVIES)
+        self.assertEqual(inserted["id"].tolist(), ["4"])
+        self.assertEqual(updated.values.tolist(), [["2", "Second!", "2002"]])
+        self.assertEqual(deleted.values.tolist(), [["3"]])
+
+    def test_replaced_table(self):
+        # changed row of (1, 2) is deleted and inserted again
+        new = pd.DataFrame(
+            {"movie_id": [1, 1, 3], "actor_id": [1, 2, 4], "characters": ["A", "D", "E"]}
+        )
+        inserted, updated, deleted = self.diff("cast", new, CAST)
+        self.assertEqual(inserted.values.tolist(), [["1", "2", "D"], ["3", "4", "E"]])
+        self.assertTrue(updated.empty)
+        self.assertEqual(sorted(deleted.values.tolist()), [["1", "2"], ["2", "3"]])
+
+    def test_missing_characters_are_unchanged(self):
+        cast = CAST.assign(characters=[None, "B", "C"])
+        inserted, updated, deleted = self.diff("cast", cast, cast)
+        self.assertEqual((len(inserted), len(updated), len(deleted)), (0, 0, 0))
+
+    def test_missing_side(self):
+        inserted, updated, deleted = self.diff("movies", MOVIES, None)
+        self.assertEqual((len(inserted), len(updated), len(deleted)), (3, 0, 0))
+        inserted, updated, deleted = self.diff("cast", None, CAST)
+        self.assertEqual((len(inserted), len(updated), len(deleted)), (0, 0, 3))
+        inserted, updated, deleted = self.parser.diff_table("ratings")
+        self.assertEqual((len(inserted), len(updated), len(deleted)), (0, 0, 0))
+
+    def test_shards_match_single_file(self):
+        inserted, updated, deleted = self.diff("movies", MOVIES, MOVIES, shards=2)
+        self.assertEqual((len(inserted), len(updated), len(deleted)), (0, 0, 0))
+
+    @unittest.skipIf(pq is None, "requires pyarrow")
+    def test_parquet_matches_csv(self):
+        cast = CAST.assign(characters=[None, "B", "C"])
+        actors = pd.DataFrame(
+            {"id": [1, 2], "name": ["One", "Two"], "birth_year": [1950.0, None], "death_year": [None, None]}
+        )
+        for table, frame in (("movies", MOVIES), ("cast", cast), ("actors", actors)):
+            inserted, updated, deleted = self.diff(table, frame, frame, file_format="parquet", shards=2)
+            self.assertEqual((len(inserted), len(updated), len(deleted)), (0, 0, 0))
+
+
+if __name__ == "__main__":
+    unittest.main()
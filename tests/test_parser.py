@@ -0,0 +1,131 @@
+import contextlib
+import io
+import os
+import tempfile
+import unittest
+import numpy as np
+import pandas as pd
+from database.parser import Range_reader
+from database.shards import merge_table, pq, read_manifest, read_table, table_files
+from tests.toy import toy_parser
+
+HEADER = "tconst\ttitleType\tprimaryTitle\toriginalTitle\tisAdult\tstartYear\tendYear\truntimeMinutes\tgenres\n"
+
+
+def title_basics(num_rows: int = 300):
+    """Raw title basics rows with some shorts and missing or too old years, which are filtered out"""
+    lines = [HEADER]
+    for i in range(1, num_rows + 1):
+        title_type = "short" if i % 7 == 0 else "movie"
+        year = "\\N" if i % 11 == 0 else str(1930 + i % 90)
+        lines.append(f"tt{i:07d}\t{title_type}\tTitle {i}\tTitle {i}\t0\t{year}\t\\N\t90\tDrama\n")
+    return "".join(lines)
+
+
+class Byte_ranges_test(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.parser = toy_parser(self.directory.name)
+        self.file_path = os.path.join(self.parser.raw_dir, "title_basics.tsv")
+        with open(self.file_path, "w", encoding="UTF-8") as f:
+            f.write(title_basics())
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_ranges_are_line_aligned_and_cover_file(self):
+        with open(self.file_path, "rb") as f:
+            content = f.read()
+        for num_processes in (1, 2, 8, 1000):
+            with self.subTest(num_processes=num_processes):
+                names, ranges = self.parser.byte_ranges(self.file_path, num_processes)
+                self.assertEqual(names, HEADER.rstrip("\n").split("\t"))
+                self.assertEqual(ranges[0][0], len(HEADER))
+                self.assertEqual(ranges[-1][1], len(content))
+                for (_, end), (start, _) in zip(ranges, ranges[1:]):
+                    self.assertEqual(end, start)
+                for start, end in ranges:
+                    self.assertLess(start, end)
+                    self.assertEqual(content[end - 1:end], b"\n")
+
+    def test_block_size_limits_ranges(self):
+        self.parser.block_size = 100
+        _, ranges = self.parser.byte_ranges(self.file_path, 1)
+        # range ends at first newline after block, so it is at most block and one line long
+        self.assertTrue(all(end - start < 100 + 80 for start, end in ranges))
+
+    def test_range_reader_reads_only_its_range(self):
+        with open(self.file_path, "rb") as f:
+            content = f.read()
+        _, ranges = self.parser.byte_ranges(self.file_path, 4)
+        parts = []
+        for start, end in ranges:
+            reader = Range_reader(self.file_path, start, end)
+            with io.BufferedReader(reader, buffer_size=64) as f:
+                parts.append(f.read())
+            self.assertEqual(reader.position, end - start)
+        self.assertEqual(b"".join(parts), content[len(HEADER):])
+
+
+class Transform_test(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def transform(self, name: str, file_format: str = "csv", num_processes: int = 2, block_size: int = 64 * 2**20):
+        parser = toy_parser(os.path.join(self.directory.name, name), file_format, block_size=block_size)
+        with open(os.path.join(parser.raw_dir, "title_basics.tsv"), "w", encoding="UTF-8") as f:
+            f.write(title_basics())
+        with parser.CustomManager() as manager, contextlib.redirect_stdout(io.StringIO()):
+            parser.bytes_read = manager.Counter(0)
+            ids = parser.multi_process_transform(
+                func=parser.transform_title_basics,
+                file="title_basics.tsv",
+                num_processes=num_processes,
+                cols=["tconst", "titleType", "originalTitle", "startYear"],
+                chunksize=20,
+            )
+            self.assertEqual(parser.bytes_read.value(), parser.num_bytes)
+        return parser, ids
+
+    def test_shards_match_one_process(self):
+        single, single_ids = self.transform("single", num_processes=1)
+        sharded, sharded_ids = self.transform("sharded", block_size=1000)
+        shards = read_manifest(sharded.transformed_dir)["movies"]
+        self.assertGreater(len(shards), len(read_manifest(single.transformed_dir)["movies"]))
+
+        np.testing.assert_array_equal(sharded_ids, single_ids)
+        movies = read_table(single.transformed_dir, "movies")
+        self.assertEqual(sum(shard["rows"] for shard in shards), len(movies))
+        pd.testing.assert_frame_equal(read_table(sharded.transformed_dir, "movies"), movies)
+        self.assertTrue(movies["start_year"].between(1945, 2023).all())
+        self.assertEqual(sorted(movies["id"].tolist()), single_ids.tolist())
+
+        # merged shards are the same file whatever the number of ranges
+        single.merge_shards()
+        sharded.merge_shards()
+        with open(os.path.join(single.transformed_dir, "movies.csv"), "rb") as f:
+            expected = f.read()
+        with open(os.path.join(sharded.transformed_dir, "movies.csv"), "rb") as f:
+            self.assertEqual(f.read(), expected)
+        self.assertEqual(table_files(sharded.transformed_dir, "movies"), [os.path.join(sharded.transformed_dir, "movies.csv")])
+        self.assertEqual(read_manifest(sharded.transformed_dir), {})
+
+    @unittest.skipIf(pq is None, "requires pyarrow")
+    def test_parquet_shards_merge_to_csv(self):
+        single, _ = self.transform("single", num_processes=1)
+        single.merge_shards()
+        sharded, _ = self.transform("parquet", "parquet", block_size=1000)
+        self.assertTrue(all(file.endswith(".parquet") for file in table_files(sharded.transformed_dir, "movies")))
+        file_path = os.path.join(self.directory.name, "movies.csv")
+        merge_table(sharded.transformed_dir, "movies", file_path)
+        with open(os.path.join(single.transformed_dir, "movies.csv"), "rb") as f:
+            expected = f.read()
+        with open(file_path, "rb") as f:
+            self.assertEqual(f.read(), expected)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,164 @@
+import unittest
+import numpy as np
+from database.constraints import Constraints
+from database.graph import Landmarks
+from find_actors import Budget_exceeded, Cancel_token, Find_Actor_BFS, Not_connected
+from path_cache import Path_cache, reverse_solution
+from tests.toy import SEARCHES, check_path, distances, find, random_graph, searching, toy_graph
+
+
+class Search_modes_test(unittest.TestCase):
+    def check_lengths(self, graph, landmarks, pairs):
+        with searching(graph, landmarks):
+            for start, goal in pairs:
+                start_id, goal_id = graph.actor_id(start), graph.actor_id(goal)
+                expected = distances(graph, start)[goal]
+                for mode, bidirectional, direction in SEARCHES:
+                    with self.subTest(start=start_id, goal=goal_id, mode=mode, bidirectional=bidirectional, direction=direction):
+                        solution = find(start_id, goal_id, mode, bidirectional, direction, max_layer=50)
+                        self.assertEqual(len(solution) - 1, expected)
+                        check_path(self, graph, solution, start_id, goal_id)
+
+    def test_toy_graph(self):
+        graph = toy_graph()
+        pairs = [(0, goal) for goal in range(1, 7)] + [(5, 1), (7, 8)]
+        self.check_lengths(graph, None, pairs)
+
+    def test_random_graphs_with_and_without_landmarks(self):
+        for seed in range(3):
+            graph = random_graph(seed)
+            rng = np.random.default_rng(seed)
+            connected = np.flatnonzero(np.asarray(graph.component) == 0)
+            pairs = [tuple(int(actor) for actor in rng.choice(connected, 2, replace=False)) for _ in range(8)]
+            for landmarks in (None, Landmarks.compute(graph, 4)):
+                self.check_lengths(graph, landmarks, pairs)
+
+    def test_same_actor(self):
+        with searching(toy_graph()):
+            for mode, bidirectional, direction in SEARCHES:
+                self.assertEqual(find(3, 3, mode, bidirectional, direction), [("", 3)])
+
+    def test_not_connected(self):
+        graph = toy_graph()
+        for landmarks in (None, Landmarks.compute(graph, 2)):
+            with searching(graph, landmarks):
+                for mode, bidirectional, direction in SEARCHES:
+                    with self.subTest(mode=mode, bidirectional=bidirectional, landmarks=landmarks is not None):
+                        with self.assertRaises(Not_connected):
+                            find(1, 8, mode, bidirectional, direction)
+                        with self.assertRaises(Not_connected):
+                            find(1, 100, mode, bidirectional, direction)
+
+    def test_weighted_prefers_voted_movies(self):
+        # both paths from 1 to 4 have 3 hops, 1-7-5-4 goes through movies with more votes
+        with searching(toy_graph()):
+            solution = find(1, 4, "weighted")
+        self.assertEqual(solution, [("", 1), (5, 7), (6, 5), (4, 4)])
+
+
+class Budget_test(unittest.TestCase):
+    def check_reason(self, reason, **options):
+        with searching(toy_graph()):
+            for mode, bidirectional, direction in SEARCHES:
+                with self.subTest(mode=mode, bidirectional=bidirectional, direction=direction):
+                    with self.assertRaises(Budget_exceeded) as raised:
+                        find(1, 6, mode, bidirectional, direction, **options)
+                    self.assertEqual(raised.exception.reason, reason)
+                    self.assertEqual((raised.exception.start_id, raised.exception.goal_id), (1, 6))
+                    self.assertEqual(
+                        set(raised.exception.stats),
+                        {"expanded_nodes", "layer", "elapsed", "layer_stats"},
+                    )
+
+    def test_layers(self):
+        self.check_reason("layers", max_layer=2)
+
+    def test_nodes(self):
+        self.check_reason("nodes", max_nodes=0)
+
+    def test_time(self):
+        self.check_reason("time", timeout=-1)
+
+    def test_cancelled(self):
+        token = Cancel_token()
+        token.cancel()
+        self.check_reason("cancelled", cancel_token=token)
+
+    def test_within_budget(self):
+        with searching(toy_graph()):
+            solution = find(1, 6, max_layer=3, max_nodes=100, timeout=60, cancel_token=Cancel_token())
+        self.assertEqual(len(solution) - 1, 3)
+
+
+class K_paths_test(unittest.TestCase):
+    def test_all_shortest_paths_in_stable_order(self):
+        graph = toy_graph()
+        with searching(graph):
+            paths = Find_Actor_BFS.run_paths(1, 4, k=10)
+            self.assertEqual(paths, Find_Actor_BFS.run_paths(1, 4, k=10))
+        self.assertEqual(paths, [
+            [("", 1), (1, 2), (2, 3), (3, 4)],
+            [("", 1), (5, 7), (6, 5), (4, 4)],
+        ])
+        for path in paths:
+            check_path(self, graph, path, 1, 4)
+
+    def test_k_and_max_steps_limit_paths(self):
+        with searching(toy_graph()):
+            self.assertEqual(len(Find_Actor_BFS.run_paths(1, 4, k=1)), 1)
+            self.assertLess(len(Find_Actor_BFS.run_paths(1, 4, max_steps=3)), 2)
+            self.assertEqual(Find_Actor_BFS.run_paths(3, 3), [[("", 3)]])
+
+    def test_paths_under_constraints(self):
+        with searching(toy_graph()):
+            paths = Find_Actor_BFS.run_paths(1, 4, constraints=Constraints(exclude_actors=[2]))
+        self.assertEqual(paths, [[("", 1), (5, 7), (6, 5), (4, 4)]])
+
+    def test_errors(self):
+        with searching(toy_graph()):
+            with self.assertRaises(Not_connected):
+                Find_Actor_BFS.run_paths(1, 8)
+            with self.assertRaises(Budget_exceeded):
+                Find_Actor_BFS.run_paths(1, 4, max_layer=2)
+
+
+class Path_cache_test(unittest.TestCase):
+    def test_key_per_dataset_version(self):
+        cache = Path_cache()
+        solution = [("", 1), (5, 7), (6, 5)]
+        cache.set(1, 5, "v1", solution)
+        self.assertEqual(cache.get(1, 5, "v1"), solution)
+        self.assertEqual(cache.get(5, 1, "v1"), reverse_solution(solution))
+        self.assertIsNone(cache.get(1, 5, "v2"))
+        cache.set(1, 5, None, solution)
+        self.assertIsNone(cache.get(1, 5, None))
+
+    def test_search_hits_and_misses(self):
+        cache = Path_cache()
+        with searching(toy_graph("v1")):
+            solution = find(1, 5, cache=cache)
+        self.assertEqual(cache.get(1, 5, "v1"), solution)
+
+        # hit returns stored solution without searching
+        stored = [("", 1), (1, 2), (2, 3), (3, 4), (4, 5)]
+        cache.set(1, 5, "v1", stored)
+        with searching(toy_graph("v1")):
+            self.assertEqual(find(1, 5, cache=cache), stored)
+            # longer than max_layer is searched again
+            self.assertEqual(find(1, 5, cache=cache, max_layer=3), solution)
+
+        # new dataset version misses
+        with searching(toy_graph("v2")):
+            self.assertEqual(find(1, 5, cache=cache), solution)
+        self.assertEqual(cache.get(1, 5, "v2"), solution)
+
+    def test_weighted_and_constrained_are_cached_apart(self):
+        cache = Path_cache()
+        with searching(toy_graph("v1")):
+            find(1, 5, "weighted", cache=cache)
+        self.assertIsNone(cache.get(1, 5, "v1"))
+        self.assertIsNotNone(cache.get(1, 5, "v1:weighted"))
+
+
+if __name__ == "__main__":
+    unittest.main()
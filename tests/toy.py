@@ -0,0 +1,101 @@
+import contextlib
+import os
+import numpy as np
+import pandas as pd
+from unittest import mock
+import database.parser
+from database.constraints import Movie_attributes, get_masks
+from database.graph import Cast_graph, Graph_BFS
+from find_actors import Find_Actor_BFS
+
+# Small cast with two shortest paths from actor 1 to actor 4 (1-2-3-4 and 1-7-5-4)
+# and separate component of actors 8 and 9
+TOY_CAST = [
+    (1, 1), (1, 2),
+    (2, 2), (2, 3),
+    (3, 3), (3, 4),
+    (4, 4), (4, 5), (4, 6),
+    (5, 1), (5, 7),
+    (6, 7), (6, 5),
+    (7, 8), (7, 9),
+]
+
+
+# Every search over in-memory graph: (mode, bidirectional, direction)
+SEARCHES = [
+    ("vectorized", False, "auto"),
+    ("vectorized", False, "top_down"),
+    ("vectorized", False, "bottom_up"),
+    ("vectorized", True, "auto"),
+    ("astar", False, "auto"),
+    ("graph", False, "auto"),
+    ("graph", True, "auto"),
+    ("weighted", False, "auto"),
+]
+
+
+def find(start_id, goal_id, mode="vectorized", bidirectional=False, direction="auto", **options):
+    options.setdefault("cache", None)
+    return Find_Actor_BFS.run(start_id, goal_id, mode=mode, bidirectional=bidirectional, direction=direction, **options)
+
+
+def toy_graph(dataset: str | None = "toy"):
+    cast = pd.DataFrame(TOY_CAST, columns=["movie_id", "actor_id"])
+    return Cast_graph.from_frame(cast, dataset)
+
+
+def random_graph(seed: int, num_movies: int = 120, num_actors: int = 300, cast_size: int = 3):
+    """Sparse random cast with a few components, same for same seed"""
+    rng = np.random.default_rng(seed)
+    movies = np.repeat(np.arange(1, num_movies + 1), cast_size)
+    actors = rng.integers(1, num_actors + 1, len(movies))
+    cast = pd.DataFrame({"movie_id": movies, "actor_id": actors})
+    return Cast_graph.from_frame(cast, f"random-{seed}")
+
+
+def toy_attributes(graph: Cast_graph):
+    """Movie attributes with start year 2000 + movie id, votes 10 * movie id and region US"""
+    movie_ids = np.asarray(graph.movie_ids)
+    movies = pd.DataFrame({"id": movie_ids, "start_year": 2000 + movie_ids})
+    ratings = pd.DataFrame({"movie_id": movie_ids, "average": 7.0, "num_votes": 10 * movie_ids})
+    akas = pd.DataFrame({"movie_id": movie_ids, "region": "US"})
+    return Movie_attributes.from_frames(graph, movies, ratings, akas)
+
+
+def distances(graph: Cast_graph, source: int):
+    """Hops from source actor index to every actor, -1 if unreachable"""
+    search = Graph_BFS(graph, source, "top_down")
+    search.run()
+    return np.asarray(search.distance)
+
+
+@contextlib.contextmanager
+def searching(graph: Cast_graph, landmarks=None, center_trees: dict | None = None):
+    """Makes searches of find_actors use graph instead of snapshot in database/data"""
+    attributes = toy_attributes(graph)
+    get_masks.cache_clear()
+    with contextlib.ExitStack() as stack:
+        for module in ("find_actors", "database.constraints"):
+            stack.enter_context(mock.patch(f"{module}.get_graph", return_value=graph))
+            stack.enter_context(mock.patch(f"{module}.get_movie_attributes", return_value=attributes))
+        stack.enter_context(mock.patch("find_actors.get_landmarks", return_value=landmarks))
+        stack.enter_context(mock.patch("find_actors.get_center_trees", return_value=center_trees or {}))
+        yield
+    get_masks.cache_clear()
+
+
+def check_path(test, graph: Cast_graph, solution: list, start_id: int, goal_id: int):
+    """Asserts that solution goes from start to goal through movies shared by consecutive actors"""
+    test.assertEqual(solution[0], ("", start_id))
+    test.assertEqual(solution[-1][1], goal_id)
+    for (_, previous), (movie, actor) in zip(solution, solution[1:]):
+        cast = graph.actors_of(graph.movie_indices([movie])[0])
+        test.assertIn(graph.actor_index(previous), cast)
+        test.assertIn(graph.actor_index(actor), cast)
+
+
+def toy_parser(directory: str, file_format: str = "csv", **kwargs):
+    """Parser keeping raw, transformed and previous files in data directory inside directory"""
+    os.makedirs(os.path.join(directory, "data", "raw"), exist_ok=True)
+    with mock.patch.object(database.parser, "__file__", os.path.join(directory, "parser.py")):
+        return database.parser.Parser("", file_format=file_format, **kwargs)